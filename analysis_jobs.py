@@ -0,0 +1,219 @@
+"""Background voice analysis on a bounded pool of worker processes.
+
+The Streamlit script submits a recording and gets a job id back at once;
+the analysis itself runs in a worker process (decoded once into a
+DecodedAudio, every feature derived from its one STFT), so a long
+recording does not block the script thread and concurrent sessions do
+not compete for one interpreter. The worker also renders the analysis
+figure from the same DecodedAudio, so the script thread only displays
+PNG bytes. The UI polls status() on each rerun and collects the result
+when the job is done.
+
+At most max_pending jobs may be queued or running; submit raises
+QueueFull beyond that so a busy node sheds load instead of growing an
+unbounded backlog. Queue depth, wait time (submit to start) and latency
+(submit to finish) are tracked for sizing workers per node.
+
+A job whose recording was replaced is cancelled (or, once running, left
+to finish and dropped). Finished jobs nobody pops, e.g. of a session
+that ended mid-analysis, are dropped FINISHED_TTL seconds after they
+finish.
+
+Each job's stage timings are collected in the worker and merged into the
+parent's instrumentation registry when it finishes; a job submitted with
+profile=True also runs under cProfile and its capture is kept in
+profiles (the most recent PROFILES_KEPT).
+"""
+import collections
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from decoded_audio import DecodedAudio
+from analysis_plots import render_analysis_png
+from instrumentation import REGISTRY, stage, record_stages, profile_call, tracking_allocations
+
+DEFAULT_WORKERS = int(os.environ.get("VOICE_ANALYSIS_WORKERS", os.cpu_count() or 1))
+DEFAULT_MAX_PENDING = 4 * DEFAULT_WORKERS
+
+# Number of recent jobs kept for the wait/latency percentiles
+METRICS_WINDOW = 1000
+PROFILES_KEPT = 5
+# Seconds a finished job's result is kept for pop()
+FINISHED_TTL = 600.0
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class QueueFull(RuntimeError):
+    """Raised by submit when max_pending jobs are already queued or running"""
+
+def analyze_recording(audio_bytes, sample_rate=22050):
+    """(app.analyze_audio's dict, PNG of its figure) for WAV bytes, from one decode and one STFT"""
+    with stage("analysis.total"):
+        with stage("analysis.decode"):
+            audio = DecodedAudio.from_bytes(audio_bytes, sample_rate)
+        analysis = audio.analysis()
+    return analysis, render_analysis_png(audio, analysis)
+
+def _run_job(audio_bytes, sample_rate, allocations=False, profile=False):
+    # Wall-clock times so they compare with the submit time in the parent
+    started = time.time()
+    capture = None
+    with record_stages(allocations) as stages:
+        if profile:
+            result, capture = profile_call(analyze_recording, audio_bytes, sample_rate)
+        else:
+            result = analyze_recording(audio_bytes, sample_rate)
+    return result, started, time.time(), stages, capture
+
+class Job:
+    def __init__(self, job_id, future):
+        self.id = job_id
+        self.future = future
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.image = None
+        self.error = None
+        self.abandoned = False
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return FAILED
+        if self.finished is not None:
+            return DONE
+        # A done future whose callback has not run yet still counts as running
+        return RUNNING if self.future.running() or self.future.done() else PENDING
+
+class AnalysisQueue:
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 registry=REGISTRY):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.expired = 0
+        self.waits = collections.deque(maxlen=METRICS_WINDOW)
+        self.latencies = collections.deque(maxlen=METRICS_WINDOW)
+        self.registry = registry
+        self.profiles = collections.deque(maxlen=PROFILES_KEPT)
+
+    def submit(self, audio_bytes, sample_rate=22050, profile=False):
+        """Queue a recording for analysis and return its job id
+
+        Workers track allocations when this process does; profile=True
+        captures a cProfile of this one job.
+        """
+        with self._lock:
+            self._expire()
+            if self._active >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._active} analysis jobs already queued")
+            job_id = next(self._ids)
+            future = self._executor.submit(_run_job, audio_bytes, sample_rate,
+                                           tracking_allocations(), profile)
+            self._jobs[job_id] = Job(job_id, future)
+            self._active += 1
+            self.submitted += 1
+        future.add_done_callback(lambda f, job_id=job_id: self._finish(job_id, f))
+        return job_id
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished is not None:
+                return
+            job.finished = time.time()
+            self._active -= 1
+            if future.cancelled():
+                self.cancelled += 1
+                del self._jobs[job_id]
+                return
+            stages = capture = None
+            try:
+                output, job.started, job.finished, stages, capture = future.result()
+                job.result, job.image = output
+                self.completed += 1
+            except Exception as e:
+                job.error = e
+                self.failed += 1
+            if job.abandoned:
+                del self._jobs[job_id]
+            if job.started is not None:
+                self.waits.append(job.started - job.submitted)
+            self.latencies.append(job.finished - job.submitted)
+            if capture is not None:
+                self.profiles.append({'job_id': job_id, 'time': job.finished, **capture})
+        if stages:
+            self.registry.merge(stages)
+        if job.started is not None:
+            self.registry.observe("queue.wait", job.started - job.submitted)
+
+    def status(self, job_id):
+        """pending, running, done or failed; None for an unknown job"""
+        job = self._jobs.get(job_id)
+        return job.status if job is not None else None
+
+    def cancel(self, job_id):
+        """Give up on a job: cancelled if still queued, dropped when it finishes otherwise"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job.finished is not None:
+                del self._jobs[job_id]
+                return
+            job.abandoned = True
+        # Outside the lock: cancelling runs _finish, which takes it
+        job.future.cancel()
+
+    def _expire(self):
+        cutoff = time.time() - FINISHED_TTL
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
+            self.expired += 1
+
+    def pop(self, job_id):
+        """Remove a finished job and return (result, figure PNG, error)"""
+        with self._lock:
+            job = self._jobs.pop(job_id)
+        return job.result, job.image, job.error
+
+    def metrics(self):
+        """Queue depth, counters and wait/latency percentiles in seconds"""
+        with self._lock:
+            waits = np.array(self.waits)
+            latencies = np.array(self.latencies)
+            metrics = {
+                'workers': self.workers,
+                'queue_depth': self._active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'cancelled': self.cancelled,
+                'expired': self.expired,
+            }
+        for name, values in (('wait', waits), ('latency', latencies)):
+            for q in (50, 95):
+                metrics[f'{name}_p{q}'] = float(np.percentile(values, q)) if len(values) else 0.0
+        return metrics
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
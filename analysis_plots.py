@@ -0,0 +1,181 @@
+"""Display-resolution rendering of the audio analysis figure.
+
+The figure is drawn at the resolution it is shown at. Each signal is
+reduced to its axes' pixel size before matplotlib sees it:
+- The waveform and zero-crossing rate become one (min, max) pair per
+  pixel column, drawn as a filled band, so every peak stays visible.
+- The magnitude spectrogram is max-pooled to one column per pixel and
+  onto log-spaced frequency rows, one per pixel of the log axis.
+- The MFCC matrix is mean-pooled in time.
+Drawing cost then depends on the figure size, not on the recording length.
+
+Figures are plain matplotlib.figure.Figure objects, not pyplot figures:
+pyplot keeps every figure it creates until plt.close, which is how
+per-rerun plots leaked memory. render_analysis_png renders to PNG, clears
+the figure, and keeps the bytes in RENDER_CACHE, an LRU keyed by the
+recording's hash. A rerun with the same recording returns the cached
+image without drawing anything.
+"""
+import collections
+import io
+import threading
+import numpy as np
+from matplotlib.figure import Figure
+from instrumentation import stage
+
+# Bump when the figure's appearance changes so cached images are redrawn
+RENDER_VERSION = 1
+
+FIGSIZE = (12, 8)
+DPI = 100
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Fixed margins for FIGSIZE; tight_layout measured every tick label on each
+# render and cost as much as the drawing itself
+SUBPLOT_PARAMS = dict(left=0.06, right=0.98, bottom=0.07, top=0.95, wspace=0.2, hspace=0.3)
+
+def minmax_decimate(y, width):
+    """(bin edges as sample indices, min per bin, max per bin), at most width bins"""
+    y = np.asarray(y)
+    bins = max(1, min(width, len(y)))
+    starts = np.linspace(0, len(y), bins + 1).astype(np.int64)
+    # Every bin is non-empty because bins <= len(y)
+    lo = np.minimum.reduceat(y, starts[:-1]) if len(y) else np.zeros(0)
+    hi = np.maximum.reduceat(y, starts[:-1]) if len(y) else np.zeros(0)
+    return starts, lo, hi
+
+def pool_columns(S, width, reduce=np.maximum):
+    """Reduce the columns (frames) of S to at most width groups; returns (S, group starts)"""
+    n = S.shape[1]
+    groups = max(1, min(width, n))
+    starts = np.linspace(0, n, groups + 1).astype(np.int64)
+    if n == 0:
+        return S, starts
+    if reduce is np.add:
+        return np.add.reduceat(S, starts[:-1], axis=1) / np.diff(starts), starts
+    return reduce.reduceat(S, starts[:-1], axis=1), starts
+
+def log_frequency_rows(S, sr, n_fft, height):
+    """Max-pool the frequency bins of S onto height log-spaced bands; returns (S, band edges in Hz)"""
+    bin_freqs = np.arange(S.shape[0]) * sr / n_fft
+    # The log axis starts at the first non-DC bin
+    edges = np.geomspace(bin_freqs[1], sr / 2, height + 1)
+    starts = np.clip(np.searchsorted(bin_freqs, edges[:-1]), 1, S.shape[0] - 1)
+    # reduceat returns the single starting bin for bands narrower than a bin
+    return np.maximum.reduceat(S, starts, axis=0), edges
+
+def axes_pixels(fig, ax):
+    """(width, height) of an axes in device pixels"""
+    position = ax.get_position()
+    width, height = fig.get_size_inches() * fig.dpi
+    return int(np.ceil(position.width * width)), int(np.ceil(position.height * height))
+
+def _plot_band(ax, y, rate, width):
+    """Min/max band of y, one step per pixel column"""
+    if len(y) == 0:
+        return
+    starts, lo, hi = minmax_decimate(y, width)
+    # Repeat the last bin so the final step reaches the end of the signal
+    ax.fill_between(starts / rate, np.append(lo, lo[-1]), np.append(hi, hi[-1]),
+                    step="post", linewidth=0.5)
+    ax.set_xlim(0, len(y) / rate)
+
+def build_analysis_figure(audio, analysis_results, figsize=FIGSIZE, dpi=DPI):
+    """Waveform, spectrogram, MFCC and zero-crossing-rate panels for a DecodedAudio"""
+    import librosa
+    import librosa.display
+    fig = Figure(figsize=figsize, dpi=dpi)
+    axes = fig.subplots(2, 2, gridspec_kw=SUBPLOT_PARAMS)
+    y, sr, hop = audio.y, audio.sr, audio.hop_length
+    frame_rate = sr / hop
+
+    # Waveform
+    width, _ = axes_pixels(fig, axes[0, 0])
+    _plot_band(axes[0, 0], y, sr, width)
+    axes[0, 0].set_title('Waveform')
+    axes[0, 0].set_xlabel('Time (s)')
+
+    # Spectrogram: audio's STFT, which DecodedAudio.analysis derives its MFCC from
+    width, height = axes_pixels(fig, axes[0, 1])
+    S, column_starts = pool_columns(audio.magnitude, width)
+    S, freq_edges = log_frequency_rows(S, sr, audio.n_fft, height)
+    D = librosa.amplitude_to_db(S, ref=np.max)
+    librosa.display.specshow(D, x_coords=column_starts / frame_rate, y_coords=freq_edges,
+                             x_axis='time', y_axis='log', ax=axes[0, 1])
+    axes[0, 1].set_title('Spectrogram')
+
+    # MFCC
+    width, _ = axes_pixels(fig, axes[1, 0])
+    mfcc = np.asarray(analysis_results['features']['mfcc'])
+    mfcc, column_starts = pool_columns(mfcc, width, reduce=np.add)
+    if mfcc.shape[1]:
+        librosa.display.specshow(mfcc, x_coords=column_starts / frame_rate,
+                                 y_coords=np.arange(mfcc.shape[0] + 1), x_axis='time',
+                                 ax=axes[1, 0])
+    axes[1, 0].set_title('MFCC')
+
+    # Zero crossing rate
+    width, _ = axes_pixels(fig, axes[1, 1])
+    _plot_band(axes[1, 1], np.asarray(analysis_results['features']['zero_crossing_rate']),
+               frame_rate, width)
+    axes[1, 1].set_title('Zero Crossing Rate')
+    axes[1, 1].set_xlabel('Time (s)')
+    return fig
+
+class RenderCache:
+    """LRU of rendered images by key, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            if key in self._images:
+                self.size -= len(self._images.pop(key))
+            self._images[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.size = 0
+
+RENDER_CACHE = RenderCache()
+
+def render_analysis_png(audio, analysis_results, key=None, cache=RENDER_CACHE):
+    """PNG bytes of the analysis figure, cached under key (e.g. the audio's sha256)"""
+    cache_key = (key, RENDER_VERSION, FIGSIZE, DPI) if key is not None else None
+    if cache_key is not None:
+        image = cache.get(cache_key)
+        if image is not None:
+            return image
+    with stage("render.figure"):
+        fig = build_analysis_figure(audio, analysis_results)
+    with stage("render.png"):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+    # Drop the artists now rather than whenever the figure is collected
+    fig.clear()
+    del fig
+    image = buffer.getvalue()
+    if cache_key is not None:
+        cache.put(cache_key, image)
+    return image
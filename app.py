@@ -1,27 +1,18 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 from datetime import datetime
 import time
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-from audio_recorder_streamlit import audio_recorder
-import plotly.graph_objects as go
-import plotly.express as px
-from PIL import Image
 import io
-import scipy.signal
+import os
+import hashlib
 import warnings
-from scipy.signal import hilbert 
 warnings.filterwarnings('ignore')
 from style import apply_custom_css
-import io
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.units import inch
+from instrumentation import stage
+
+# librosa, matplotlib, plotly, pandas, reportlab, the recorder component and
+# the audio analysis modules are imported inside the functions that use
+# them, so a cold start and the first steps render without loading them
 
 
 
@@ -71,56 +62,193 @@ def initialize_session_state():
         st.session_state.audio_analysis = {}
     if 'analysis_results' not in st.session_state:
         st.session_state.analysis_results = {}
+    if 'audio_digests' not in st.session_state:
+        st.session_state.audio_digests = {}
+    if 'analysis_cache_stats' not in st.session_state:
+        st.session_state.analysis_cache_stats = {'hits': 0, 'misses': 0}
+    if 'analysis_jobs' not in st.session_state:
+        st.session_state.analysis_jobs = {}
+    if 'analysis_plots' not in st.session_state:
+        st.session_state.analysis_plots = {}
 
 def reset_session():
+    # Jobs of the cleared session would otherwise run for nobody
+    queue = get_analysis_queue()
+    for _, job_id, _ in st.session_state.get('analysis_jobs', {}).values():
+        if job_id is not None:
+            queue.cancel(job_id)
     st.session_state.clear()
 
-def analyze_audio(audio_bytes, sample_rate=22050):
-    """Analyze audio for health indicators"""
+def analyze_audio(audio_bytes, sample_rate=22050, on_update=None):
+    """Analyze audio for health indicators
+
+    audio_bytes may be raw WAV bytes, a PCMBuffer (e.g. an entry of a
+    recording_archive) or a DecodedAudio. Bytes and buffers are analyzed
+    one chunk at a time; on_update, if given, receives the
+    running health indicators after every chunk. A DecodedAudio is analyzed
+    from its memoized transforms, which plot_audio_analysis then reuses.
+    """
+    from audio_stream import analyze_stream
+    from decoded_audio import DecodedAudio
     try:
-        # Load audio data
-        y, sr = librosa.load(io.BytesIO(audio_bytes), sr=sample_rate)
-        
-        # Extract features
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
-        
-        # Calculate health indicators
-        breathing_rate = estimate_breathing_rate(y, sr)
-        voice_stability = calculate_voice_stability(y)
-        
-        return {
-            'features': {
-                'mfcc': mfcc,
-                'spectral_centroids': spectral_centroids,
-                'zero_crossing_rate': zero_crossing_rate
-            },
-            'health_indicators': {
-                'breathing_rate': breathing_rate,
-                'voice_stability': voice_stability,
-                'duration': len(y) / sr
-            }
-        }
+        if isinstance(audio_bytes, DecodedAudio):
+            return analyze_decoded_audio(audio_bytes)
+        return analyze_stream(audio_bytes, sample_rate, on_update)
     except Exception as e:
         st.error(f"Audio analysis error: {str(e)}")
         return None
 
-def estimate_breathing_rate(y, sr):
+def analyze_decoded_audio(audio):
+    """analyze_audio for a recording that is already decoded"""
+    return audio.analysis()
+
+# Seconds between reruns while analysis jobs are outstanding
+JOB_POLL_INTERVAL = 0.5
+# Seconds a recording turned away by a full queue keeps being resubmitted
+QUEUE_RETRY_SECONDS = 60.0
+
+# Set VOICE_ADMIN_PANEL=1 to show stage timings and profiling in the sidebar
+ADMIN_PANEL = os.environ.get("VOICE_ADMIN_PANEL") == "1"
+
+@st.cache_resource
+def get_analysis_queue():
+    """Worker pool shared by every session of this server process"""
+    from analysis_jobs import AnalysisQueue
+    return AnalysisQueue()
+
+@st.cache_resource
+def get_results_store():
+    """Screening history in health_monitor.db, shared by every session"""
+    from results_store import ResultsStore
+    return ResultsStore()
+
+def current_user_id():
+    """Identifier screenings are stored under, from the Patient ID; None if none was given"""
+    from results_store import patient_user_id
+    return patient_user_id(st.session_state.get('user_data', {}).get('patient_id'))
+
+def store_screening(test_id, digest, analysis_results):
+    """Queue an analyzed recording for the current user's history
+
+    Rows are written in the background; failed writes show up in the
+    admin panel's screening history counters.
+    """
+    user_id = current_user_id()
+    if user_id is None:
+        return
+    try:
+        get_results_store().record(user_id, test_id, analysis_results, audio_sha256=digest)
+    except ValueError as e:
+        st.warning(f"Could not save this screening: {str(e)}")
+
+def analyze_recording(test_id, audio_bytes):
+    """Analysis of a recording, memoized per session on a hash of the bytes
+
+    Streamlit reruns the script on every interaction and audio_recorder
+    keeps returning the last recording, so results are reused while the
+    bytes are unchanged. New recordings are analyzed by the background
+    queue; this returns None until the job finishes, and a later rerun
+    collects the result. A job for a replaced recording is cancelled.
+
+    analysis_jobs maps test_id to (digest, job_id, retry_until). job_id
+    is None while a recording turned away by a full queue is resubmitted
+    on each rerun until retry_until, and once it has been given up
+    (retry_until None).
+    """
+    from analysis_jobs import QueueFull, DONE, FAILED
+    digest = hashlib.sha256(audio_bytes).hexdigest()
+    stats = st.session_state.analysis_cache_stats
+    if (st.session_state.audio_digests.get(test_id) == digest
+            and test_id in st.session_state.audio_analysis):
+        stats['hits'] += 1
+        return st.session_state.audio_analysis[test_id]
+
+    queue = get_analysis_queue()
+    jobs = st.session_state.analysis_jobs
+    if test_id in jobs and jobs[test_id][0] != digest:
+        # Re-recorded while the old recording was queued or running
+        if jobs[test_id][1] is not None:
+            queue.cancel(jobs[test_id][1])
+        del jobs[test_id]
+    if test_id in jobs:
+        _, job_id, retry_until = jobs[test_id]
+        if job_id is None:
+            if retry_until is None:
+                return None
+            if time.time() > retry_until:
+                jobs[test_id] = (digest, None, None)
+                return None
+        else:
+            status = queue.status(job_id)
+            if status not in (DONE, FAILED, None):
+                return None
+            del jobs[test_id]
+            if status is not None:
+                analysis_results, image, error = queue.pop(job_id)
+                if error is not None:
+                    st.error(f"Audio analysis error: {str(error)}")
+                    return None
+                st.session_state.audio_digests[test_id] = digest
+                st.session_state.audio_analysis[test_id] = analysis_results
+                st.session_state.analysis_plots[test_id] = image
+                store_screening(test_id, digest, analysis_results)
+                return analysis_results
+
+    try:
+        job_id = queue.submit(audio_bytes,
+                              profile=st.session_state.get('profile_next_analysis', False))
+    except QueueFull:
+        retry_until = jobs[test_id][2] if test_id in jobs else time.time() + QUEUE_RETRY_SECONDS
+        jobs[test_id] = (digest, None, retry_until)
+        return None
+    st.session_state.profile_next_analysis = False
+    stats['misses'] += 1
+    jobs[test_id] = (digest, job_id, None)
+    return None
+
+def show_job_status(test_id):
+    """Placeholder shown while a recording waits for its analysis job"""
+    from analysis_jobs import RUNNING
+    jobs = st.session_state.analysis_jobs
+    if test_id not in jobs:
+        return
+    _, job_id, retry_until = jobs[test_id]
+    if job_id is not None:
+        status = get_analysis_queue().status(job_id)
+        st.info("Analyzing your recording..." if status == RUNNING
+                else "Waiting for an analysis worker...")
+    elif retry_until is not None:
+        st.warning("The analysis queue is full; retrying your recording...")
+    else:
+        st.error("The analysis queue stayed full and this recording was not analyzed. "
+                 "Please record it again.")
+
+def poll_analysis_jobs():
+    """Rerun shortly while this session has analysis jobs queued, running or to resubmit
+
+    Called at the end of main(), once the whole page is drawn.
+    """
+    from analysis_jobs import PENDING, RUNNING
+    queue = get_analysis_queue()
+    if any(queue.status(job_id) in (PENDING, RUNNING) if job_id is not None
+           else retry_until is not None and time.time() <= retry_until
+           for _, job_id, retry_until in st.session_state.analysis_jobs.values()):
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+def estimate_breathing_rate(y, sr, envelope=None):
     """Estimate breathing rate from audio"""
-    envelope = np.abs(hilbert(y))
-    peaks = librosa.util.peak_pick(envelope, pre_max=sr//4, post_max=sr//4,
-                                 pre_avg=sr//4, post_avg=sr//4, delta=0.1, wait=sr//4)
-    if len(peaks) > 1:
-        breathing_rate = 60 / (np.mean(np.diff(peaks)) / sr)
-        return min(breathing_rate, 30)  # Cap at 30 breaths per minute
-    return 0
-
-def calculate_voice_stability(y):
+    from envelope import compute_envelope, breathing_rate_from_envelope
+    if envelope is None:
+        envelope = compute_envelope(y, sr)
+    return breathing_rate_from_envelope(envelope.values, envelope.rate)
+
+def calculate_voice_stability(y, sr=22050, envelope=None):
     """Calculate voice stability score"""
-    envelope = np.abs(hilbert(y))
-    stability = 1.0 / (np.std(envelope) + 1e-6)
-    return min(stability * 10, 100)  # Scale and cap at 100
+    from envelope import compute_envelope, stability_from_std
+    if envelope is None:
+        envelope = compute_envelope(y, sr)
+    return stability_from_std(envelope.std)
 
 def show_quality_indicators(analysis_results):
     """Display quality indicators for voice recording"""
@@ -153,15 +281,20 @@ def detect_voice_anomalies():
     }
 
 def calculate_voice_trends():
-    """Calculate trends in voice metrics over time"""
-    return {
-        'stability_trend': np.random.normal(0, 1, 10),
-        'quality_trend': np.random.normal(0, 1, 10),
-        'breathing_trend': np.random.normal(0, 1, 10)
-    }
+    """Running statistics of the current user's stored screenings, per test type and metric"""
+    import sqlite3
+    user_id = current_user_id()
+    if user_id is None:
+        return {}
+    try:
+        return get_results_store().trends(user_id)
+    except sqlite3.Error as e:
+        st.warning(f"Could not load your screening history: {str(e)}")
+        return {}
 
 def show_voice_patterns_plot(patterns):
     """Display voice patterns visualization"""
+    import plotly.graph_objects as go
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -181,6 +314,7 @@ def show_voice_patterns_plot(patterns):
 
 def show_anomalies_plot(anomalies):
     """Display voice anomalies visualization"""
+    import plotly.graph_objects as go
     fig = go.Figure()
     
     for anomaly_type, values in anomalies.items():
@@ -229,6 +363,7 @@ def generate_combined_assessment(voice_analysis, medical_risks):
 
 def show_health_score_gauge(score):
     """Display health score gauge"""
+    import plotly.graph_objects as go
     fig = go.Figure(go.Indicator(
         mode="gauge+number",
         value=score,
@@ -269,22 +404,44 @@ def show_health_risks_analysis(medical_risks):
                 delta=f"{np.random.normal(0, 5):.1f}%"
             )
 
-def show_trend_analysis():
+def show_trend_analysis(trends):
     """Display trend analysis"""
+    import pandas as pd
+    import plotly.graph_objects as go
     st.subheader("Health Trends Over Time")
     
-    # Generate sample trend data
-    dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
-    trends = pd.DataFrame({
-        'date': dates,
-        'health_score': np.random.normal(80, 5, 10),
-        'voice_quality': np.random.normal(85, 5, 10),
-        'breathing_rate': np.random.normal(75, 5, 10)
-    })
+    if not trends:
+        st.info("No stored screenings yet. Trends appear once your recordings are analyzed.")
+        return
     
-    fig = px.line(trends, x='date', y=['health_score', 'voice_quality', 'breathing_rate'])
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    rows = [
+        {'test': test_type, 'metric': metric, **stats}
+        for test_type, metrics in sorted(trends.items())
+        for metric, stats in metrics.items()
+    ]
+    table = pd.DataFrame(rows)
+    table['last_screening'] = pd.to_datetime(table.pop('last_at'), unit='s').dt.date
+    table = table.drop(columns='first_at')
+    headline = table['metric'].isin(['voice_stability', 'breathing_rate'])
+    
+    cols = st.columns(2)
+    for col, metric in zip(cols, ['voice_stability', 'breathing_rate']):
+        stats = table[table['metric'] == metric]
+        if stats.empty:
+            continue
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=stats['test'], y=stats['mean'], name='Average',
+                             error_y=dict(type='data', array=stats['std'])))
+        fig.add_trace(go.Scatter(x=stats['test'], y=stats['ewma'], name='Recent',
+                                 mode='markers', marker=dict(size=12)))
+        fig.update_layout(title=metric.replace('_', ' ').title(), height=400)
+        with col:
+            st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(table[headline], hide_index=True, use_container_width=True)
+    if (~headline).any():
+        with st.expander("Parkinson's voice measures"):
+            st.dataframe(table[~headline], hide_index=True, use_container_width=True)
 
 def show_ai_insights(assessment):
     """Display AI-generated insights"""
@@ -365,79 +522,80 @@ def generate_health_report(report_type):
     """Generate health report PDF"""
     return b"Sample PDF content"  # Placeholder for actual PDF generation
 
-def plot_audio_analysis(y, sr, analysis_results):
-    """Create audio analysis visualizations"""
-    fig, axes = plt.subplots(2, 2, figsize=(12, 8))
-    
-    # Waveform
-    axes[0,0].plot(np.linspace(0, len(y)/sr, len(y)), y)
-    axes[0,0].set_title('Waveform')
-    axes[0,0].set_xlabel('Time (s)')
-    
-    # Spectrogram
-    D = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
-    librosa.display.specshow(D, y_axis='log', x_axis='time', ax=axes[0,1])
-    axes[0,1].set_title('Spectrogram')
-    
-    # MFCC
-    librosa.display.specshow(analysis_results['features']['mfcc'], 
-                           x_axis='time', ax=axes[1,0])
-    axes[1,0].set_title('MFCC')
-    
-    # Zero crossing rate
-    axes[1,1].plot(analysis_results['features']['zero_crossing_rate'])
-    axes[1,1].set_title('Zero Crossing Rate')
-    
-    plt.tight_layout()
-    return fig
+def plot_audio_analysis(audio, analysis_results):
+    """Create audio analysis visualizations for a DecodedAudio
 
-def collect_voice_samples():
-    """Enhanced voice sample collection with real-time analysis"""
-    st.header("🎤 Advanced Voice Analysis")
-    st.success("""
-        Please provide voice samples as requested. Our AI system will analyze your voice patterns
-        in real-time for various health indicators.
-    """)
-    
-    instructions = {
-        "breathing": "Take deep breaths normally for 10 seconds",
-        "vowel": "Say 'Aaaaah' for as long as you can",
-        "counting": "Count from 1 to 20 at a normal pace"
-    }
-    
-    for test_name, instruction in instructions.items():
-        st.subheader(f"Test: {test_name.title()}")
-        st.success(instruction)
-        
-        audio_bytes = audio_recorder(key=f"recorder_{test_name}")
-        
-        if audio_bytes:
-            st.session_state.audio_samples[test_name] = audio_bytes
-            st.audio(audio_bytes, format="audio/wav")
-            
-            # Analyze audio
-            analysis = analyze_audio(audio_bytes)
-            if analysis:
-                st.session_state.analysis_results[test_name] = analysis
-                
-                # Display metrics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Breathing Rate", 
-                             f"{analysis['health_indicators']['breathing_rate']:.1f} bpm")
-                with col2:
-                    st.metric("Voice Stability", 
-                             f"{analysis['health_indicators']['voice_stability']:.1f}%")
-                with col3:
-                    st.metric("Duration", 
-                             f"{analysis['health_indicators']['duration']:.1f}s")
-                
-                # Plot analysis
-                fig = plot_audio_analysis(librosa.load(io.BytesIO(audio_bytes))[0],
-                                       22050, analysis)
-                st.pyplot(fig)
-    
-    return len(st.session_state.audio_samples) >= len(instructions)
+    Returns a matplotlib Figure drawn at display resolution (see
+    analysis_plots); it is not registered with pyplot, so it is freed with
+    its last reference. render_analysis_png gives the cached PNG instead.
+    """
+    from analysis_plots import build_analysis_figure
+    return build_analysis_figure(audio, analysis_results)
+
+def show_analysis_plot(test_id):
+    """Analysis figure of a recording, as rendered by its analysis job"""
+    image = st.session_state.analysis_plots.get(test_id)
+    if image:
+        st.image(image)
+
+def show_admin_panel():
+    """Sidebar panel with per-stage timings, metric exports and profiling"""
+    import json
+    import pandas as pd
+    from instrumentation import REGISTRY, format_gauges, track_allocations, tracking_allocations
+    queue = get_analysis_queue()
+    with st.sidebar:
+        st.header("⚙️ Pipeline Admin")
+        snapshot = REGISTRY.snapshot()
+        if snapshot:
+            st.dataframe(pd.DataFrame([{
+                'stage': name,
+                'count': stats['count'],
+                'total_s': round(stats['sum_seconds'], 2),
+                'mean_ms': round(stats['mean_seconds'] * 1000, 1),
+                'p95_ms': round(stats['p95_seconds'] * 1000, 1),
+                'max_ms': round(stats['max_seconds'] * 1000, 1),
+                'peak_alloc_kb': (round(stats['alloc_max_bytes'] / 1024)
+                                  if stats['alloc_count'] else None),
+            } for name, stats in snapshot.items()]), hide_index=True)
+        else:
+            st.caption("No pipeline stages timed yet.")
+
+        store_metrics = get_results_store().metrics()
+        st.caption(f"Screening history: {store_metrics['written']} written, "
+                   f"{store_metrics['queued']} queued, {store_metrics['failed_rows']} lost")
+        if store_metrics['last_error']:
+            st.error(f"Last screening history write error: {store_metrics['last_error']}")
+
+        queue_metrics = queue.metrics()
+        st.download_button(
+            "Prometheus metrics",
+            REGISTRY.to_prometheus() + format_gauges(queue_metrics, "voice_analysis_queue")
+            + format_gauges(store_metrics, "voice_results_store"),
+            file_name="metrics.prom", mime="text/plain")
+        st.download_button(
+            "JSON metrics",
+            json.dumps({'stages': snapshot, 'queue': queue_metrics,
+                        'results_store': store_metrics}, indent=2),
+            file_name="metrics.json", mime="application/json")
+
+        trace = st.checkbox("Track allocations", value=tracking_allocations(),
+                            help="Peak traced allocation per stage; slows analysis down")
+        if trace != tracking_allocations():
+            track_allocations(trace)
+        if st.button("Profile next analysis"):
+            st.session_state.profile_next_analysis = True
+        if st.session_state.get('profile_next_analysis'):
+            st.caption("The next new recording will be analyzed under cProfile.")
+        if queue.profiles:
+            capture = queue.profiles[-1]
+            with st.expander(f"Profile of analysis job {capture['job_id']}"):
+                st.code(capture['report'])
+            st.download_button("Download .prof", capture['data'],
+                               file_name=f"analysis_job_{capture['job_id']}.prof",
+                               mime="application/octet-stream")
+        if st.button("Reset timings"):
+            REGISTRY.reset()
 
 def show_header():
     """Enhanced header with system status"""
@@ -460,6 +618,10 @@ def collect_demographics():
     col1, col2, col3 = st.columns(3)
     with col1:
         name = st.text_input("Full Name", value="Saif", key="name")
+        patient_id = st.text_input(
+            "Patient ID", key="patient_id",
+            help="Screenings are kept in a history under this ID, shared with the "
+                 "Parkinson's screening; leave empty to keep none")
         age = st.number_input("Age", min_value=1, max_value=120, value=25)
         gender = st.selectbox("Gender", ["Select", "Male", "Female", "Other"], index=1)
         blood_group = st.selectbox(
@@ -484,6 +646,15 @@ def collect_demographics():
         location = st.text_input("City/Village", value="Hyderabad")
         pin_code = st.text_input("PIN Code", value="500001")
 
+    if patient_id.strip():
+        from results_store import patient_user_id, PATIENT_ID_KEY_ENV
+        if patient_user_id(patient_id) is None:
+            st.info(f"No screening history will be kept: the server has no {PATIENT_ID_KEY_ENV} set.")
+
+    # Widget values are dropped once the step is left; keep what later steps use
+    st.session_state.user_data.update(name=name, age=age, gender=gender, pin_code=pin_code,
+                                      patient_id=patient_id)
+
     
     return all([name, age, gender != "Select", blood_group != "Select", 
                 languages, location, pin_code])
@@ -572,6 +743,7 @@ def collect_medical_history():
 
 def collect_voice_samples():
     """Enhanced voice sample collection with real-time analysis"""
+    from audio_recorder_streamlit import audio_recorder
     st.header("🎤 Advanced Voice Analysis")
     st.success("""
         Please provide voice samples as requested. Our AI system will analyze your voice patterns
@@ -659,13 +831,16 @@ def collect_voice_samples():
                         st.session_state.audio_samples[test_id] = audio_bytes
                         samples_collected += 1
                         
-                        analysis_results = analyze_audio(audio_bytes)
+                        analysis_results = analyze_recording(test_id, audio_bytes)
                         if analysis_results:
-                            st.session_state.audio_analysis[test_id] = analysis_results
                             st.session_state.analysis_results[test_id] = analysis_results
                             
                             st.audio(audio_bytes, format="audio/wav")
                             display_realtime_metrics(analysis_results, test_info['metrics'])
+                            with st.expander("Analysis plots"):
+                                show_analysis_plot(test_id)
+                        else:
+                            show_job_status(test_id)
             
             with col2:
                 if i + 1 < len(test_pairs):
@@ -697,13 +872,16 @@ def collect_voice_samples():
                         st.session_state.audio_samples[test_id] = audio_bytes
                         samples_collected += 1
                         
-                        analysis_results = analyze_audio(audio_bytes)
+                        analysis_results = analyze_recording(test_id, audio_bytes)
                         if analysis_results:
-                            st.session_state.audio_analysis[test_id] = analysis_results
                             st.session_state.analysis_results[test_id] = analysis_results
                             
                             st.audio(audio_bytes, format="audio/wav")
                             display_realtime_metrics(analysis_results, test_info['metrics'])
+                            with st.expander("Analysis plots"):
+                                show_analysis_plot(test_id)
+                        else:
+                            show_job_status(test_id)
 
             with col3:
                 if i + 2 < len(test_pairs):
@@ -735,17 +913,26 @@ def collect_voice_samples():
                         st.session_state.audio_samples[test_id] = audio_bytes
                         samples_collected += 1
                         
-                        analysis_results = analyze_audio(audio_bytes)
+                        analysis_results = analyze_recording(test_id, audio_bytes)
                         if analysis_results:
-                            st.session_state.audio_analysis[test_id] = analysis_results
                             st.session_state.analysis_results[test_id] = analysis_results
                             
                             st.audio(audio_bytes, format="audio/wav")
                             display_realtime_metrics(analysis_results, test_info['metrics'])
+                            with st.expander("Analysis plots"):
+                                show_analysis_plot(test_id)
+                        else:
+                            show_job_status(test_id)
 
         st.markdown("---")
         st.write(f"Samples collected: {samples_collected}")
         st.write(f"Analysis results stored: {len(st.session_state.analysis_results)}")
+        cache_stats = st.session_state.analysis_cache_stats
+        st.caption(f"Analysis cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        queue_metrics = get_analysis_queue().metrics()
+        st.caption(f"Analysis queue: {queue_metrics['queue_depth']} active on "
+                   f"{queue_metrics['workers']} workers | wait p95 {queue_metrics['wait_p95']:.1f}s | "
+                   f"latency p95 {queue_metrics['latency_p95']:.1f}s")
         
         if samples_collected < 3:
             st.warning("Please complete at least 3 voice tests to proceed.")
@@ -788,114 +975,18 @@ def show_risk_assessment():
         show_health_risks_analysis(medical_risks)
     
     with tabs[2]:
-        show_trend_analysis()
+        show_trend_analysis(voice_analysis['trends'])
     
     with tabs[3]:
         show_ai_insights(combined_assessment)
     
     return True
 
+@stage("report.pdf")
 def generate_pdf_report(patient_data, analysis_results):
     """Generate a PDF report with patient data and analysis results"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    styles.add(ParagraphStyle(
-        name='CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30
-    ))
-    
-    # Title
-    story.append(Paragraph("Medical Assessment Report", styles['CustomTitle']))
-    story.append(Spacer(1, 12))
-    
-    # Patient Information
-    story.append(Paragraph("Patient Information", styles['Heading2']))
-    patient_info = [
-        ["Name:", patient_data.get('name', 'Saif')],
-        ["Age:", str(patient_data.get('age', '20')) + " years"],
-        ["Gender:", patient_data.get('gender', 'Male')],
-        ["Assessment Date:", datetime.now().strftime("%Y-%m-%d")],
-    ]
-    
-    t = Table(patient_info, colWidths=[2*inch, 4*inch])
-    t.setStyle(TableStyle([
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 20))
-    
-    # Health Scores
-    story.append(Paragraph("Health Assessment Scores", styles['Heading2']))
-    
-    # Add health scores table instead of plot
-    health_scores = [
-        ["Metric", "Score"],
-        ["Voice Stability", f"{analysis_results.get('voice_stability', 0):.1f}%"],
-        ["Breathing Rate", f"{analysis_results.get('breathing_rate', 0):.1f} bpm"],
-        ["Overall Health", f"{analysis_results.get('overall_score', 0):.1f}%"]
-    ]
-    
-    t = Table(health_scores, colWidths=[3*inch, 3*inch])
-    t.setStyle(TableStyle([
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 20))
-    
-    # Risk Assessment
-    story.append(Paragraph("Risk Assessment", styles['Heading2']))
-    risk_data = [
-        ["Condition", "Risk Level", "Recommendation"],
-        ["Respiratory Issues", "Low", "Regular monitoring"],
-        ["Voice Disorders", "Medium", "Voice therapy recommended"],
-        ["Sleep Apnea", "Low", "Follow sleep hygiene practices"],
-    ]
-    
-    t = Table(risk_data, colWidths=[2*inch, 1.5*inch, 3*inch])
-    t.setStyle(TableStyle([
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(t)
-    story.append(Spacer(1, 20))
-    
-    # Recommendations
-    story.append(Paragraph("Recommendations", styles['Heading2']))
-    recommendations = analysis_results.get('recommendations', [
-        "Schedule follow-up assessment",
-        "Practice breathing exercises",
-        "Monitor voice strain levels"
-    ])
-    for rec in recommendations:
-        story.append(Paragraph(f"• {rec}", styles['Normal']))
-        story.append(Spacer(1, 6))
-    
-    # Disclaimer
-    story.append(Spacer(1, 30))
-    story.append(Paragraph("Disclaimer:", styles['Heading4']))
-    story.append(Paragraph(
-        "This report is generated based on AI-powered voice analysis and should be reviewed "
-        "by a healthcare professional. The recommendations provided are general in nature "
-        "and should not replace professional medical advice.",
-        styles['Normal']
-    ))
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+    from reports import render_report
+    return io.BytesIO(render_report(patient_data, analysis_results))
 
 def show_recommendations():
     """Enhanced recommendations with actionable insights"""
@@ -1111,6 +1202,8 @@ def main():
     initialize_session_state() 
     try:
         show_header()
+        if ADMIN_PANEL:
+            show_admin_panel()
         
         # Enhanced step navigation
         steps = {
@@ -1153,6 +1246,7 @@ def main():
         if st.button("Reset Application"):
             reset_session()
             st.rerun()
+    poll_analysis_jobs()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
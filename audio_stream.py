@@ -0,0 +1,150 @@
+import numpy as np
+import librosa
+import soxr
+from pcm_buffer import PCMBuffer
+from envelope import EnvelopeFollower, breathing_rate_from_envelope, stability_from_std
+from instrumentation import stage
+
+def iter_audio_chunks(audio_bytes, sample_rate=22050, chunk_seconds=1.0):
+    """Yield mono float32 blocks of WAV bytes (or a PCMBuffer), resampled to sample_rate
+
+    Blocks are converted from the canonical PCM buffer one at a time, so
+    only one chunk of float samples exists at once.
+    """
+    buffer = audio_bytes if isinstance(audio_bytes, PCMBuffer) else PCMBuffer.from_wav_bytes(audio_bytes)
+    resampler = None
+    if buffer.sr != sample_rate:
+        resampler = soxr.ResampleStream(buffer.sr, sample_rate, 1, dtype="float32")
+    blocksize = int(chunk_seconds * buffer.sr)
+    for start in range(0, buffer.frames, blocksize):
+        chunk = buffer.to_float(start, start + blocksize)
+        if resampler is not None:
+            chunk = resampler.resample_chunk(chunk, last=False)
+        if len(chunk):
+            yield chunk
+    if resampler is not None:
+        tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if len(tail):
+            yield tail
+
+class StreamingAnalyzer:
+    """Incremental version of analyze_audio for audio arriving in chunks
+
+    MFCC, spectral centroid and zero-crossing frames are computed from one
+    STFT per chunk; the last n_fft - hop_length samples are kept between
+    chunks so frames spanning a chunk boundary are not lost. Frames are not
+    centre-padded (center=False), unlike librosa's defaults. Only the
+    low-rate envelope is kept for the breathing rate and the voice
+    stability uses the envelope's running variance, so memory does not grow
+    with the raw recording length.
+    """
+
+    def __init__(self, sr=22050, n_fft=2048, hop_length=512, n_mfcc=13):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+        self.window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.n_samples = 0
+        self.mfcc_frames = []
+        self.centroid_frames = []
+        self.zcr_frames = []
+
+        self.envelope_follower = EnvelopeFollower(sr)
+        self.envelope = []
+
+    def feed(self, chunk):
+        """Consume the next block of float samples at self.sr"""
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.n_samples += len(chunk)
+        with stage("analysis.spectral"):
+            self._update_frames(chunk)
+        with stage("analysis.envelope"):
+            self._update_envelope(chunk)
+
+    def _update_frames(self, chunk):
+        buffer = np.concatenate([self.pending, chunk])
+        if len(buffer) < self.n_fft:
+            self.pending = buffer
+            return
+        n_frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        frames = librosa.util.frame(buffer[:(n_frames - 1) * self.hop_length + self.n_fft],
+                                    frame_length=self.n_fft, hop_length=self.hop_length)
+        self.pending = buffer[n_frames * self.hop_length:]
+
+        magnitude = np.abs(np.fft.rfft(frames * self.window[:, None], axis=0))
+        mel_power = self.mel_basis @ magnitude ** 2
+        self.mfcc_frames.append(librosa.feature.mfcc(
+            S=librosa.power_to_db(mel_power, top_db=None), n_mfcc=self.n_mfcc))
+        self.centroid_frames.append(
+            librosa.feature.spectral_centroid(S=magnitude, sr=self.sr, n_fft=self.n_fft)[0])
+        signs = np.signbit(frames)
+        self.zcr_frames.append(np.sum(signs[1:] != signs[:-1], axis=0) / self.n_fft)
+
+    def _update_envelope(self, chunk):
+        envelope = self.envelope_follower.process(chunk)
+        if len(envelope):
+            self.envelope.append(envelope)
+
+    def breathing_rate(self):
+        """Breaths per minute from envelope peaks, capped at 30"""
+        if not self.envelope:
+            return 0
+        envelope = np.concatenate(self.envelope)
+        self.envelope = [envelope]
+        return breathing_rate_from_envelope(envelope, self.envelope_follower.rate)
+
+    def voice_stability(self):
+        """Stability score from the envelope spread, capped at 100"""
+        return stability_from_std(self.envelope_follower.std)
+
+    def health_indicators(self):
+        """Running health indicators, from the envelope and its running statistics
+
+        Cheap enough to call after every chunk: nothing here touches the
+        spectral frames, and the breathing estimate scans the envelope at
+        ENVELOPE_RATE (50 values per second of audio).
+        """
+        return {
+            'breathing_rate': self.breathing_rate(),
+            'voice_stability': self.voice_stability(),
+            'duration': self.n_samples / self.sr
+        }
+
+    def result(self):
+        """Current analysis in the same shape analyze_audio returns
+
+        Concatenates every frame seen so far; call it once, at the end.
+        """
+        def stack(frames, rows=None):
+            if frames:
+                return np.concatenate(frames, axis=-1)
+            return np.zeros((rows, 0)) if rows else np.zeros(0)
+
+        return {
+            'features': {
+                'mfcc': stack(self.mfcc_frames, self.n_mfcc),
+                'spectral_centroids': stack(self.centroid_frames),
+                'zero_crossing_rate': stack(self.zcr_frames)
+            },
+            'health_indicators': self.health_indicators()
+        }
+
+def analyze_stream(audio_bytes, sample_rate=22050, on_update=None):
+    """Decode and analyze WAV bytes chunk by chunk; returns analyze_audio's dict
+
+    on_update, if given, receives the running health indicators after
+    every chunk. Stage timings: analysis.total per recording,
+    analysis.spectral and analysis.envelope per chunk.
+    """
+    with stage("analysis.total"):
+        analyzer = StreamingAnalyzer(sr=sample_rate)
+        for chunk in iter_audio_chunks(audio_bytes, sample_rate):
+            analyzer.feed(chunk)
+            if on_update is not None:
+                on_update(analyzer.health_indicators())
+        with stage("analysis.result"):
+            return analyzer.result()
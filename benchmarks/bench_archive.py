@@ -0,0 +1,73 @@
+"""Reading many short recordings: individual WAV files vs a packed archive.
+
+Usage:
+    python benchmarks/bench_archive.py [--count 2000] [--duration 1.0]
+
+Writes --count synthetic WAVs to a temporary directory, packs them with
+recording_archive.pack, then reads every recording as float samples via
+librosa.load, parselmouth.Sound, and RecordingArchive.buffer(). Exits
+non-zero if the archive's samples differ from the files'.
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+import numpy as np
+import librosa
+import parselmouth
+import common
+from synthetic import sustained_vowel, write_wav
+from recording_archive import RecordingArchive, pack
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=1.0)
+    parser.add_argument("--sr", type=int, default=22050)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "wavs")
+        os.makedirs(source)
+        base = sustained_vowel(args.duration, args.sr)
+        paths = [write_wav(os.path.join(source, f"{i:06d}.wav"), np.roll(base, i), args.sr)
+                 for i in range(args.count)]
+
+        archive_path = os.path.join(tmp, "archive")
+        start = time.perf_counter()
+        pack(paths, archive_path, root=source)
+        pack_s = time.perf_counter() - start
+        archive = RecordingArchive(archive_path)
+        names = archive.names
+
+        rows = [
+            ("librosa.load", timed(lambda p: librosa.load(p, sr=None), paths)),
+            ("parselmouth.Sound", timed(parselmouth.Sound, paths)),
+            ("archive buffer().samples()", timed(lambda n: archive.buffer(n).samples(), names)),
+        ]
+        file_samples = librosa.load(paths[-1], sr=None)[0]
+        archive_samples = archive.buffer(names[-1]).samples()
+
+    table = [{
+        "reader": name,
+        "total_s": f"{seconds:.2f}",
+        "us_per_recording": f"{seconds / args.count * 1e6:.0f}",
+        "speedup": f"{rows[0][1] / seconds:.1f}x",
+    } for name, seconds in rows]
+    print(f"{args.count} recordings of {args.duration:g}s at {args.sr} Hz; "
+          f"packed in {pack_s:.2f}s")
+    common.print_table(table, ["reader", "total_s", "us_per_recording", "speedup"])
+
+    if not np.array_equal(file_samples, archive_samples):
+        raise SystemExit("Archive samples differ from the WAV files")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Micro-batched vs per-request scoring of concurrent single-row requests.
+
+Usage:
+    python benchmarks/bench_batcher.py [--callers 256] [--max-batch-size 64] [--max-wait-ms 5]
+
+Each of --callers coroutines scores one feature row. "direct" runs one
+predict_proba per caller in the default thread pool; "batched" sends the
+same rows through MicroBatcher. Exits non-zero if the batched
+predictions differ from the direct ones.
+"""
+import argparse
+import asyncio
+import time
+import warnings
+import numpy as np
+import common
+from batcher import MicroBatcher
+from model_registry import load_model
+from predict import predict_batch
+from bench_forest import synthetic_features
+
+async def run_direct(model, X):
+    loop = asyncio.get_running_loop()
+
+    async def one(row):
+        start = time.perf_counter()
+        result = await loop.run_in_executor(None, lambda: predict_batch(row, model=model))
+        return result, (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one(row) for row in X))
+
+async def run_batched(model, X, max_batch_size, max_wait_ms):
+    batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    batcher.start()
+
+    async def one(row):
+        start = time.perf_counter()
+        result = await batcher.predict(row)
+        return result, (time.perf_counter() - start) * 1000
+
+    try:
+        results = await asyncio.gather(*(one(row) for row in X))
+    finally:
+        await batcher.stop()
+    return results, batcher.metrics()
+
+def summarize(name, results, elapsed):
+    latencies = np.array([ms for _, ms in results])
+    return {
+        "mode": name,
+        "requests": len(results),
+        "req_per_s": f"{len(results) / elapsed:.0f}",
+        "p50_ms": f"{np.percentile(latencies, 50):.1f}",
+        "p95_ms": f"{np.percentile(latencies, 95):.1f}",
+        "p99_ms": f"{np.percentile(latencies, 99):.1f}",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=256)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    model = load_model(common.MODEL_PATH)
+    X = synthetic_features(args.callers)
+    predict_batch(X[:1], model=model)  # warm up
+
+    start = time.perf_counter()
+    direct = asyncio.run(run_direct(model, X))
+    direct_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched, metrics = asyncio.run(run_batched(model, X, args.max_batch_size, args.max_wait_ms))
+    batched_elapsed = time.perf_counter() - start
+
+    common.print_table([summarize("direct", direct, direct_elapsed),
+                        summarize("batched", batched, batched_elapsed)],
+                       ["mode", "requests", "req_per_s", "p50_ms", "p95_ms", "p99_ms"])
+    print(f"Batches: {metrics['batches']}, mean size {metrics['mean_batch_size']:.1f}, "
+          f"queue delay p95 {metrics['queue_delay_p95_ms']:.1f} ms")
+    print("Batch sizes:", {k: v for k, v in metrics["batch_size_histogram"].items() if v})
+
+    expected = np.concatenate([result for result, _ in direct])
+    actual = np.concatenate([result for result, _ in batched])
+    if not (np.array_equal(expected["prediction"], actual["prediction"])
+            and np.allclose(expected["probability"], actual["probability"])):
+        raise SystemExit("Batched predictions differ from per-request predictions")
+
+if __name__ == "__main__":
+    main()
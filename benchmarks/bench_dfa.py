@@ -0,0 +1,55 @@
+"""fast_dfa vs nolds.dfa: agreement and speed across recording lengths.
+
+Usage:
+    python benchmarks/bench_dfa.py [--seconds 1 3 10] [--nolds-max-seconds 10]
+
+nolds is only run up to --nolds-max-seconds (it takes minutes on long
+recordings). Exits non-zero if fast_dfa differs from
+nolds.dfa(fit_exp="poly") by more than dfa.DFA_TOLERANCE.
+"""
+import argparse
+import time
+import warnings
+import nolds
+import common
+import synthetic
+from dfa import fast_dfa, DFA_TOLERANCE
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--sr", type=int, default=44100)
+    parser.add_argument("--nolds-max-seconds", type=float, default=10)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    rows = []
+    worst = 0.0
+    for seconds in args.seconds:
+        y = synthetic.sustained_vowel(seconds, args.sr, seed=int(seconds)).astype(float)
+        fast, fast_ms = timed(lambda: fast_dfa(y))
+        _, fast_dec_ms = timed(lambda: fast_dfa(y, decimate=4))
+        row = {"seconds": seconds, "samples": len(y), "fast_dfa": f"{fast:.6f}",
+               "fast_ms": f"{fast_ms:.0f}", "fast_decimate4_ms": f"{fast_dec_ms:.0f}",
+               "nolds_poly": "-", "nolds_ms": "-", "speedup": "-", "nolds_ransac": "-"}
+        if seconds <= args.nolds_max_seconds:
+            reference, nolds_ms = timed(lambda: nolds.dfa(y, fit_exp="poly"))
+            worst = max(worst, abs(reference - fast))
+            row.update(nolds_poly=f"{reference:.6f}", nolds_ms=f"{nolds_ms:.0f}",
+                       speedup=f"{nolds_ms / fast_ms:.0f}x",
+                       nolds_ransac=f"{nolds.dfa(y):.6f}")
+        rows.append(row)
+
+    common.print_table(rows, ["seconds", "samples", "fast_dfa", "nolds_poly", "nolds_ransac",
+                              "fast_ms", "fast_decimate4_ms", "nolds_ms", "speedup"])
+    print(f"\nMax |fast_dfa - nolds_poly| = {worst:.2e} (tolerance {DFA_TOLERANCE:.0e})")
+    if worst > DFA_TOLERANCE:
+        raise SystemExit("fast_dfa is outside the documented tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Decimated envelope vs the original full-rate Hilbert indicators.
+
+Usage:
+    python benchmarks/bench_envelope.py [--seconds 10 20 40] [--tolerance 1.5]
+
+Times estimate_breathing_rate + calculate_voice_stability as they were
+(two full-signal Hilbert FFTs, peak picking at the audio rate) against one
+compute_envelope pass feeding both, and prints both sets of values. Exits
+non-zero if the decimated rate on a synthetic breathing signal is more than
+--tolerance breaths per minute off the rate it was generated at.
+"""
+import argparse
+import time
+import numpy as np
+import librosa
+from scipy.signal import hilbert
+import common
+import synthetic
+from envelope import compute_envelope, breathing_rate_from_envelope, stability_from_std
+
+def legacy_breathing_rate(y, sr):
+    envelope = np.abs(hilbert(y))
+    peaks = librosa.util.peak_pick(envelope, pre_max=sr//4, post_max=sr//4,
+                                   pre_avg=sr//4, post_avg=sr//4, delta=0.1, wait=sr//4)
+    if len(peaks) > 1:
+        return min(60 / (np.mean(np.diff(peaks)) / sr), 30)
+    return 0
+
+def legacy_stability(y):
+    envelope = np.abs(hilbert(y))
+    return min(10.0 / (np.std(envelope) + 1e-6), 100)
+
+def decimated_indicators(y, sr):
+    envelope = compute_envelope(y, sr)
+    return (breathing_rate_from_envelope(envelope.values, envelope.rate),
+            stability_from_std(envelope.std))
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--sr", type=int, default=22050)
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="largest accepted bpm error on the breathing signals")
+    args = parser.parse_args()
+
+    rows, misses = [], []
+    for seconds in args.seconds:
+        # name -> (signal, rate it breathes at; None for no breathing)
+        signals = {
+            "breathing_12bpm": (synthetic.breathing(seconds, args.sr, 12, seed=1), 12),
+            "breathing_20bpm": (synthetic.breathing(seconds, args.sr, 20, seed=2), 20),
+            "vowel": (synthetic.sustained_vowel(seconds, args.sr, seed=3), None),
+        }
+        for name, (y, true_bpm) in signals.items():
+            (old_rate, old_stab), old_ms = timed(
+                lambda: (legacy_breathing_rate(y, args.sr), legacy_stability(y)))
+            (new_rate, new_stab), new_ms = timed(lambda: decimated_indicators(y, args.sr))
+            if true_bpm is not None and abs(new_rate - true_bpm) > args.tolerance:
+                misses.append(f"{name} over {seconds:g} s read {new_rate:.1f}")
+            rows.append({
+                "signal": name, "seconds": seconds, "true_bpm": true_bpm or "-",
+                "legacy_bpm": f"{old_rate:.1f}", "decimated_bpm": f"{new_rate:.1f}",
+                "legacy_stability": f"{old_stab:.2f}", "decimated_stability": f"{new_stab:.2f}",
+                "legacy_ms": f"{old_ms:.0f}", "decimated_ms": f"{new_ms:.0f}",
+                "speedup": f"{old_ms / new_ms:.0f}x",
+            })
+    common.print_table(rows, ["signal", "seconds", "true_bpm", "legacy_bpm", "decimated_bpm",
+                              "legacy_stability", "decimated_stability",
+                              "legacy_ms", "decimated_ms", "speedup"])
+    if misses:
+        raise SystemExit(f"Breathing rate off by more than {args.tolerance:g} bpm: "
+                         + "; ".join(misses))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Flattened forest vs sklearn predict_proba: parity check and latency.
+
+Usage:
+    python benchmarks/bench_forest.py [--batch 1000 10000]
+
+Exits non-zero if the flattened engine's probabilities differ from
+sklearn's by more than 1e-9 on any row.
+"""
+import argparse
+import warnings
+import numpy as np
+import common
+from forest_engine import FlatForest
+from model_registry import load_model
+
+def synthetic_features(n, seed=0):
+    """Feature rows spread around and beyond the training range"""
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n, 22)) * 2.0
+    # Include exact zeros (failed measurements) and repeated values
+    X[rng.rand(n, 22) < 0.1] = 0.0
+    return X
+
+def check_parity(model, forest, X):
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+    labels_match = bool((model.predict(X) == forest.predict(X)).all())
+    return max_diff, labels_match
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    model = load_model(common.MODEL_PATH)
+    forest = FlatForest.from_sklearn(model)
+
+    max_diff, labels_match = check_parity(model, forest, synthetic_features(20000))
+    print(f"Parity: max |p_flat - p_sklearn| = {max_diff:.2e}, labels match: {labels_match}")
+
+    rows = []
+    for n in args.batch:
+        X = synthetic_features(n, seed=n)
+        sk = common.time_call(lambda: model.predict_proba(X), repeat=args.repeat)
+        flat = common.time_call(lambda: forest.predict_proba(X), repeat=args.repeat)
+        rows.append({
+            "batch": n,
+            "sklearn_ms": f"{sk['p50_ms']:.3f}",
+            "flat_ms": f"{flat['p50_ms']:.3f}",
+            "speedup": f"{sk['p50_ms'] / flat['p50_ms']:.1f}x",
+            "flat_us_per_row": f"{flat['p50_ms'] * 1000 / n:.2f}",
+        })
+    common.print_table(rows, ["batch", "sklearn_ms", "flat_ms", "speedup", "flat_us_per_row"])
+
+    if max_diff > 1e-9 or not labels_match:
+        raise SystemExit("Flattened forest does not match sklearn")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Cold-start import time of the Streamlit apps, tracked over time.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--record] [--max-regression 20]
+
+Imports app.py and models/parkinson.py in fresh interpreters with
+`python -X importtime` (what a new Streamlit worker pays before its first
+paint) and reports the median total and the heaviest direct imports.
+A target that cannot be imported at all is reported and fails the run.
+--record appends the result, with the git commit, to
+benchmarks/results/import_time.json (only from a clean working tree, and
+not when a target failed to import); each run is compared with the last
+recorded entry and exits non-zero if a target got slower by more than
+--max-regression percent.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import common
+
+TARGETS = {
+    "app": (common.ROOT, "import app"),
+    "parkinson": (common.MODELS_DIR, "import parkinson"),
+}
+HISTORY_PATH = os.path.join(common.ROOT, "benchmarks", "results", "import_time.json")
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def import_profile(cwd, statement):
+    """Cumulative import time (us) of the target and of each module it imports
+    directly, from one fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([common.ROOT, common.MODELS_DIR]))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1])
+    module = statement.split()[-1]
+    # Children are printed before their parent, one indent level deeper
+    children = {}
+    for match in LINE.finditer(proc.stderr):
+        _, cumulative, indent, name = match.groups()
+        level = (len(indent) - 1) // 2
+        if level == 1:
+            children[name] = int(cumulative)
+        elif level == 0:
+            if name == module:
+                return int(cumulative), children
+            children = {}
+    raise SystemExit(f"{module} not found in the -X importtime output")
+
+def measure(cwd, statement, repeat):
+    """Median total (ms) and the direct-import breakdown of the median run"""
+    runs = sorted(import_profile(cwd, statement) for _ in range(repeat))
+    total_us, children = runs[len(runs) // 2]
+    return total_us / 1000, children
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=common.ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def load_history():
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with open(HISTORY_PATH) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list")
+    parser.add_argument("--record", action="store_true", help="append this run to the history")
+    parser.add_argument("--max-regression", type=float, default=20.0,
+                        help="percent slower than the last recorded run that fails")
+    args = parser.parse_args()
+
+    history = load_history()
+    previous = history[-1]["targets"] if history else {}
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "targets": {}}
+    if args.record and entry["commit"].endswith("-dirty"):
+        parser.error("--record needs a clean working tree, so the entry matches its commit")
+    regressions = []
+    failures = []
+    rows = []
+    for name, (cwd, statement) in TARGETS.items():
+        try:
+            total_ms, profile = measure(cwd, statement, args.repeat)
+        except ImportError as e:
+            print(f"{name}: `{statement}` failed: {e}")
+            entry["targets"][name] = None
+            failures.append(name)
+            rows.append({"target": name, "import_ms": "failed", "last_recorded_ms": "-",
+                         "change": "-"})
+            continue
+        entry["targets"][name] = round(total_ms, 1)
+        before = previous.get(name)
+        change = f"{(total_ms / before - 1) * 100:+.0f}%" if before else "-"
+        rows.append({"target": name, "import_ms": f"{total_ms:.0f}",
+                     "last_recorded_ms": f"{before:.0f}" if before else "-", "change": change})
+        if before and total_ms > before * (1 + args.max_regression / 100):
+            regressions.append(name)
+
+        heaviest = sorted(((us, mod) for mod, us in profile.items()), reverse=True)[:args.top]
+        print(f"{name}: heaviest direct imports")
+        for us, mod in heaviest:
+            print(f"  {us / 1000:8.1f} ms  {mod}")
+
+    common.print_table(rows, ["target", "import_ms", "last_recorded_ms", "change"])
+    if args.record and not failures:
+        history.append(entry)
+        os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+        with open(HISTORY_PATH, "w") as f:
+            json.dump(history, f, indent=2)
+            f.write("\n")
+    if regressions or failures:
+        raise SystemExit(f"Import time regressed for: {', '.join(regressions) or '-'}; "
+                         f"failed to import: {', '.join(failures) or '-'}")
+
+if __name__ == "__main__":
+    main()
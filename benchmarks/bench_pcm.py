@@ -0,0 +1,111 @@
+"""Memory and copies per recording: canonical PCM buffer vs the legacy decode paths.
+
+Usage:
+    python benchmarks/bench_pcm.py [--duration 10] [--sr 44100]
+
+App path: the legacy code decoded the upload with librosa.load at 22050
+Hz twice (analysis, then plotting); PCMBuffer views the WAV bytes and
+converts/resamples once for both. Model path: the legacy code quantized
+the float capture to int16, wrote a WAV, then read it through both
+parselmouth.Sound and librosa.load, and DFA later converted librosa's
+float32 samples to float64; PCMBuffer wraps the int16 capture and
+converts it once to the float64 that Praat and DFA both use.
+
+Peak traced memory is reported in bytes and as a multiple of the raw
+PCM size ("copies"); Praat's own sample storage is outside tracemalloc
+and the same for both. Exits non-zero if the new paths change samples.
+"""
+import argparse
+import io
+import os
+import tempfile
+import tracemalloc
+import warnings
+import numpy as np
+import librosa
+import parselmouth
+import common
+from synthetic import sustained_vowel, to_wav_bytes
+from pcm_buffer import PCMBuffer
+
+def legacy_app(wav_bytes):
+    y, _ = librosa.load(io.BytesIO(wav_bytes), sr=22050)
+    y_plot, _ = librosa.load(io.BytesIO(wav_bytes), sr=22050)
+    return y, y_plot
+
+def buffer_app(wav_bytes):
+    buffer = PCMBuffer.from_wav_bytes(wav_bytes)
+    return buffer.samples(22050), buffer.samples(22050)
+
+def legacy_model(capture, sr):
+    path = os.path.join(tempfile.gettempdir(), f"bench_pcm_{os.getpid()}.wav")
+    with open(path, "wb") as f:
+        f.write(to_wav_bytes(capture[:, 0], sr))
+    try:
+        sound = parselmouth.Sound(path)
+        y, _ = librosa.load(path, sr=None)
+    finally:
+        os.remove(path)
+    # fast_dfa then made its own float64 copy of librosa's float32 samples
+    return sound, np.asarray(y, dtype=np.float64)
+
+def buffer_model(capture_int16, sr):
+    buffer = PCMBuffer(capture_int16, sr)
+    y = buffer.samples(dtype=np.float64)
+    return parselmouth.Sound(y, sampling_frequency=sr), y
+
+def measure(fn, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return result, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--sr", type=int, default=44100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    y = sustained_vowel(args.duration, args.sr)
+    wav_bytes = to_wav_bytes(y, args.sr)
+    capture_int16 = (np.clip(y, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+    capture_float = capture_int16.astype(np.float32) / 32767
+    raw = capture_int16.nbytes
+
+    cases = [
+        ("app: legacy (librosa.load x2)", legacy_app, (wav_bytes,)),
+        ("app: PCMBuffer", buffer_app, (wav_bytes,)),
+        ("model: legacy (temp WAV, Praat + librosa)", legacy_model, (capture_float, args.sr)),
+        ("model: PCMBuffer", buffer_model, (capture_int16, args.sr)),
+    ]
+    rows = []
+    results = {}
+    for name, fn, fn_args in cases:
+        fn(*fn_args)  # warm up lazy imports and caches outside the measurement
+        results[name], peak = measure(fn, *fn_args)
+        timing = common.time_call(lambda: fn(*fn_args), repeat=args.repeat)
+        rows.append({
+            "path": name,
+            "peak_bytes": f"{peak:,}",
+            "copies": f"{peak / raw:.1f}",
+            "p50_ms": f"{timing['p50_ms']:.2f}",
+        })
+    print(f"Recording: {args.duration:.0f}s at {args.sr} Hz, raw PCM {raw:,} bytes")
+    common.print_table(rows, ["path", "peak_bytes", "copies", "p50_ms"])
+
+    legacy_y = results["app: legacy (librosa.load x2)"][0]
+    buffer_y = results["app: PCMBuffer"][0]
+    app_diff = float(np.abs(legacy_y[:len(buffer_y)] - buffer_y[:len(legacy_y)]).max())
+    model_diff = float(np.abs(results["model: legacy (temp WAV, Praat + librosa)"][1]
+                              - results["model: PCMBuffer"][1]).max())
+    print(f"Max sample difference: app {app_diff:.2e} (resampler), model {model_diff:.2e}")
+    if model_diff > 0 or app_diff > 1e-3:
+        raise SystemExit("PCMBuffer samples differ from the legacy decode")
+
+if __name__ == "__main__":
+    main()
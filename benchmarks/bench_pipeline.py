@@ -0,0 +1,225 @@
+"""End-to-end pipeline benchmark on a synthetic voice corpus, with a regression check.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--durations 3 10 30 60] [--rates 22050 44100]
+                                        [--repeat 3] [--save-baseline] [--threshold 25]
+
+Generates the deterministic corpus from synthetic.corpus (sustained vowels
+with normal and raised jitter/shimmer, breathing noise and coughs, at
+every duration and rate) and times, per recording:
+
+    extract_features      models/features.py (Praat, pitch, DFA)
+    predict_parkinsons    models/parkinson.py, on the extracted features
+    analyze_audio         app.py streaming analysis of the WAV bytes
+    estimate_breathing    app.py breathing rate from decoded samples
+    plot_audio_analysis   app.py figure, rendered to PNG and closed
+    generate_pdf_report   app.py report for the recording's analysis
+
+"screening" is the sum of these p50s for one recording, checked against
+the README's "<3 seconds per analysis" and "1000+ screenings" a day (per
+core). The per-stage breakdown from instrumentation.REGISTRY is included.
+
+Results go to benchmarks/results/pipeline.json. --save-baseline also
+stores them as the baseline, and refuses to run on a working tree with
+uncommitted changes, so the baseline's commit is the code it timed;
+otherwise any function/recording whose p50
+is more than --threshold percent (and --min-delta-ms) slower than the
+baseline is reported and the run exits non-zero. Everything runs offline
+on CPU. Timings are only comparable on the same machine.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import warnings
+import numpy as np
+import common
+import synthetic
+
+RESULTS_DIR = os.path.join(common.ROOT, "benchmarks", "results")
+RESULTS_PATH = os.path.join(RESULTS_DIR, "pipeline.json")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "pipeline_baseline.json")
+
+# README claims checked against the screening time
+CLAIM_SECONDS_PER_ANALYSIS = 3.0
+CLAIM_SCREENINGS_PER_DAY = 1000
+
+PATIENT = {"name": "Benchmark", "age": 40, "gender": "Female"}
+
+def load_pipeline():
+    """Import the app and model code (bare-mode Streamlit, no server)"""
+    # Streamlit warns about the missing script context on every st.* call;
+    # its config reapplies this level when it loads
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import app
+    import parkinson
+    from features import extract_features
+    from decoded_audio import DecodedAudio
+    return app, parkinson, extract_features, DecodedAudio, plt
+
+def pipeline_steps(wav_bytes, modules):
+    """(name, zero-argument callable) for each timed function on one recording"""
+    app, parkinson, extract_features, DecodedAudio, plt = modules
+    features = extract_features(wav_bytes)
+    audio = DecodedAudio.from_bytes(wav_bytes)
+    analysis = app.analyze_decoded_audio(audio)
+    summary = {
+        "voice_stability": analysis["health_indicators"]["voice_stability"],
+        "breathing_rate": analysis["health_indicators"]["breathing_rate"],
+        "overall_score": analysis["health_indicators"]["voice_stability"],
+    }
+
+    def plot():
+        fig = app.plot_audio_analysis(audio, analysis)
+        fig.savefig(io.BytesIO(), format="png")
+        plt.close(fig)
+
+    return [
+        ("extract_features", lambda: extract_features(wav_bytes)),
+        ("predict_parkinsons", lambda: parkinson.predict_parkinsons(features, common.MODEL_PATH)),
+        ("analyze_audio", lambda: app.analyze_audio(wav_bytes)),
+        ("estimate_breathing", lambda: app.estimate_breathing_rate(audio.y, audio.sr)),
+        ("plot_audio_analysis", plot),
+        ("generate_pdf_report", lambda: app.generate_pdf_report(PATIENT, summary)),
+    ]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=common.ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Rows for every timing slower than the baseline by both margins"""
+    regressions = []
+    for function, cases in results.items():
+        for case, stats in cases.items():
+            before = baseline.get(function, {}).get(case)
+            if before is None:
+                continue
+            delta = stats["p50_ms"] - before["p50_ms"]
+            if delta > min_delta_ms and stats["p50_ms"] > before["p50_ms"] * (1 + threshold / 100):
+                regressions.append({
+                    "function": function,
+                    "recording": case,
+                    "baseline_ms": f"{before['p50_ms']:.1f}",
+                    "now_ms": f"{stats['p50_ms']:.1f}",
+                    "change": f"{delta / before['p50_ms'] * 100:+.0f}%",
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[3.0, 10.0, 30.0, 60.0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[22050, 44100])
+    parser.add_argument("--kinds", nargs="+", choices=list(synthetic.CORPUS_KINDS),
+                        default=list(synthetic.CORPUS_KINDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=25.0,
+                        help="percent slower than the baseline that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore slowdowns smaller than this (timer noise)")
+    args = parser.parse_args()
+    commit = git_commit()
+    if args.save_baseline and commit.endswith("-dirty"):
+        parser.error("--save-baseline needs a clean working tree, "
+                     "so the baseline matches its commit")
+    warnings.filterwarnings("ignore")
+
+    modules = load_pipeline()
+    from instrumentation import REGISTRY
+    # Pay for lazy imports, model loading and caches before timing anything
+    for _, fn in pipeline_steps(synthetic.to_wav_bytes(synthetic.sustained_vowel(1.0), 22050),
+                                modules):
+        fn()
+    REGISTRY.reset()
+
+    results = {}
+    durations = {}
+    for name, y, sr in synthetic.corpus(args.durations, args.rates, args.kinds):
+        durations[name] = len(y) / sr
+        for function, fn in pipeline_steps(synthetic.to_wav_bytes(y, sr), modules):
+            stats = common.time_call(fn, repeat=args.repeat, warmup=0)
+            results.setdefault(function, {})[name] = {
+                "p50_ms": round(stats["p50_ms"], 2),
+                "mean_ms": round(stats["mean_ms"], 2),
+                "min_ms": round(stats["min_ms"], 2),
+            }
+        print(f"{name}: " + ", ".join(f"{function} {cases[name]['p50_ms']:.0f}"
+                                      for function, cases in results.items()) + " ms",
+              flush=True)
+
+    screening = {}
+    for name, seconds in durations.items():
+        total_ms = sum(cases[name]["p50_ms"] for cases in results.values())
+        screening[name] = {
+            "audio_seconds": seconds,
+            "p50_ms": round(total_ms, 1),
+            "meets_time_claim": total_ms / 1000 < CLAIM_SECONDS_PER_ANALYSIS,
+            "screenings_per_core_day": int(86400 / (total_ms / 1000)),
+        }
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"durations": args.durations, "rates": args.rates, "kinds": args.kinds,
+                   "repeat": args.repeat},
+        "results": results,
+        "screening": screening,
+        "stages": {name: {"count": stats["count"], "mean_ms": round(stats["mean_seconds"] * 1000, 2)}
+                   for name, stats in REGISTRY.snapshot().items()},
+    }
+
+    print()
+    common.print_table([{
+        "recording": name,
+        "screening_ms": f"{s['p50_ms']:.0f}",
+        f"<{CLAIM_SECONDS_PER_ANALYSIS:g}s": "yes" if s["meets_time_claim"] else "NO",
+        "per_core_day": f"{s['screenings_per_core_day']:,}",
+    } for name, s in screening.items()],
+        ["recording", "screening_ms", f"<{CLAIM_SECONDS_PER_ANALYSIS:g}s", "per_core_day"])
+    slowest = max(screening.values(), key=lambda s: s["p50_ms"])
+    print(f"Worst case {slowest['p50_ms'] / 1000:.2f}s per screening, "
+          f"{slowest['screenings_per_core_day']:,} per core per day "
+          f"(README: <{CLAIM_SECONDS_PER_ANALYSIS:g}s, {CLAIM_SCREENINGS_PER_DAY}+ a day)")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    paths = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    print(f"Results written to {', '.join(paths)}")
+
+    if args.save_baseline:
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\nSlower than the baseline ({baseline.get('commit', '?')}):")
+        common.print_table(regressions, ["function", "recording", "baseline_ms", "now_ms", "change"])
+        raise SystemExit(f"{len(regressions)} timings regressed by more than {args.threshold:g}%")
+    print(f"No regressions against the baseline ({baseline.get('commit', '?')})")
+
+if __name__ == "__main__":
+    main()
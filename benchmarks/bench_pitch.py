@@ -0,0 +1,88 @@
+"""Pitch backend benchmark and feature-drift report.
+
+Usage:
+    python benchmarks/bench_pitch.py [--seconds 3] [--recordings 3]
+
+Times the pitch stage and the full extract_features for every backend on
+synthetic vowels, then reports how far each backend moves the 22 features
+relative to the pyin backend the model was originally used with. Exits
+non-zero if any measurement fell back to zeros, since the drift of zeroed
+features says nothing about the backends.
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+import numpy as np
+import parselmouth
+import librosa
+import common
+import synthetic
+from features import extract_features, FEATURE_NAMES, FeatureWarning
+from pitch import track_pitch, PITCH_BACKENDS
+
+REFERENCE_BACKEND = "pyin"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--recordings", type=int, default=3)
+    parser.add_argument("--sr", type=int, default=44100)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    tmpdir = tempfile.mkdtemp()
+    paths = []
+    for i in range(args.recordings):
+        y = synthetic.sustained_vowel(args.seconds, args.sr, f0=100 + 40 * i,
+                                      jitter=0.002 * (i + 1), shimmer=0.02 * (i + 1), seed=i)
+        paths.append(synthetic.write_wav(os.path.join(tmpdir, f"vowel_{i}.wav"), y, args.sr))
+
+    timings = {}
+    features = {}
+    failures = []
+    for backend in PITCH_BACKENDS:
+        stage_ms, total_ms, rows = [], [], []
+        for path in paths:
+            sound = parselmouth.Sound(path)
+            y, sr = librosa.load(path, sr=None)
+            track_pitch(sound, y, sr, backend=backend)  # warm up numba/JIT
+            start = time.perf_counter()
+            track_pitch(sound, y, sr, backend=backend)
+            stage_ms.append((time.perf_counter() - start) * 1000)
+
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", FeatureWarning)
+                start = time.perf_counter()
+                rows.append(extract_features(path, pitch_backend=backend))
+                total_ms.append((time.perf_counter() - start) * 1000)
+            failures.extend(f"{backend} {os.path.basename(path)}: {w.message}" for w in caught
+                            if issubclass(w.category, FeatureWarning))
+        timings[backend] = (np.mean(stage_ms), np.mean(total_ms))
+        features[backend] = np.array(rows)
+
+    print(f"{args.recordings} vowels x {args.seconds:.0f}s @ {args.sr} Hz")
+    common.print_table([
+        {"backend": b, "pitch_stage_ms": f"{timings[b][0]:.1f}",
+         "extract_features_ms": f"{timings[b][1]:.1f}"}
+        for b in PITCH_BACKENDS
+    ], ["backend", "pitch_stage_ms", "extract_features_ms"])
+
+    print(f"\nMean relative drift vs {REFERENCE_BACKEND} (|x - ref| / |ref|)")
+    reference = features[REFERENCE_BACKEND]
+    others = [b for b in PITCH_BACKENDS if b != REFERENCE_BACKEND]
+    rows = []
+    for j, name in enumerate(FEATURE_NAMES):
+        row = {"feature": name}
+        for b in others:
+            diff = np.abs(features[b][:, j] - reference[:, j])
+            scale = np.maximum(np.abs(reference[:, j]), 1e-12)
+            row[b] = f"{np.mean(diff / scale):.2%}" if np.any(reference[:, j]) else f"{np.mean(diff):.3g} abs"
+        rows.append(row)
+    common.print_table(rows, ["feature"] + others)
+    if failures:
+        raise SystemExit("Measurements fell back to zeros:\n" + "\n".join(failures))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Analysis figure rendering: full-resolution pyplot figures vs display-resolution ones.
+
+Usage:
+    python benchmarks/bench_render.py [--renders 100] [--legacy-renders 10]
+                                      [--duration 30] [--sr 22050]
+
+Renders the analysis figure of one synthetic recording --renders times in
+a row to PNG, as a rerun-heavy Streamlit session would:
+
+    legacy     the old plot_audio_analysis: plt.subplots, the full waveform
+               and full spectrogram, figure never closed
+    decimated  analysis_plots.render_analysis_png without a cache key
+    cached     render_analysis_png keyed by the recording's hash
+
+Reports per-render p50/p95 and the process RSS growth over the run and
+per render. Every legacy figure stays resident (well over 100 MB each
+for a 30 s recording), so it runs only --legacy-renders times, and last,
+so its leak does not inflate the other modes' RSS.
+Exits non-zero if the decimated waveform loses the signal's extremes.
+"""
+import argparse
+import hashlib
+import io
+import os
+import time
+import warnings
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import librosa
+import librosa.display
+import common
+from synthetic import sustained_vowel, to_wav_bytes
+from decoded_audio import DecodedAudio
+from analysis_plots import RenderCache, render_analysis_png, minmax_decimate
+
+def rss_bytes():
+    """Current resident set size (Linux /proc; peak RSS elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def legacy_render(audio, analysis_results):
+    """plot_audio_analysis as it was, rendered to PNG and left open"""
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+    y, sr = audio.y, audio.sr
+    axes[0, 0].plot(np.linspace(0, len(y) / sr, len(y)), y)
+    axes[0, 0].set_title('Waveform')
+    axes[0, 0].set_xlabel('Time (s)')
+    D = librosa.amplitude_to_db(audio.magnitude, ref=np.max)
+    librosa.display.specshow(D, sr=sr, hop_length=audio.hop_length,
+                             y_axis='log', x_axis='time', ax=axes[0, 1])
+    axes[0, 1].set_title('Spectrogram')
+    librosa.display.specshow(analysis_results['features']['mfcc'], x_axis='time', ax=axes[1, 0])
+    axes[1, 0].set_title('MFCC')
+    axes[1, 1].plot(analysis_results['features']['zero_crossing_rate'])
+    axes[1, 1].set_title('Zero Crossing Rate')
+    plt.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+def run(render, renders):
+    rss_before = rss_bytes()
+    times = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        render()
+        times.append((time.perf_counter() - start) * 1000)
+    return np.array(times), rss_bytes() - rss_before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=100)
+    parser.add_argument("--legacy-renders", type=int, default=10,
+                        help="legacy renders (each leaks its figure)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--sr", type=int, default=22050)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    wav_bytes = to_wav_bytes(sustained_vowel(args.duration, args.sr), args.sr)
+    digest = hashlib.sha256(wav_bytes).hexdigest()
+    audio = DecodedAudio.from_bytes(wav_bytes)
+    analysis = {'features': {'mfcc': audio.mfcc,
+                             'zero_crossing_rate': audio.zero_crossing_rate}}
+    cache = RenderCache()
+
+    cases = [
+        ("decimated", lambda: render_analysis_png(audio, analysis, cache=cache), args.renders),
+        ("cached", lambda: render_analysis_png(audio, analysis, key=digest, cache=cache),
+         args.renders),
+        ("legacy", lambda: legacy_render(audio, analysis), args.legacy_renders),
+    ]
+    rows = []
+    for name, render, renders in cases:
+        render()  # imports, font cache and the first cache fill outside the measurement
+        times, rss_growth = run(render, renders)
+        rows.append({
+            "mode": name,
+            "renders": renders,
+            "p50_ms": f"{np.percentile(times, 50):.1f}",
+            "p95_ms": f"{np.percentile(times, 95):.1f}",
+            "total_s": f"{times.sum() / 1000:.1f}",
+            "rss_growth_mb": f"{rss_growth / 2 ** 20:+.1f}",
+            "mb_per_render": f"{rss_growth / 2 ** 20 / renders:+.2f}",
+        })
+    print(f"Analysis figure of a {args.duration:g}s recording at {args.sr} Hz "
+          f"({len(audio.y):,} samples, {audio.magnitude.shape[1]:,} STFT frames); "
+          f"open pyplot figures afterwards: {len(plt.get_fignums())}")
+    common.print_table(rows, ["mode", "renders", "p50_ms", "p95_ms", "total_s",
+                              "rss_growth_mb", "mb_per_render"])
+
+    _, lo, hi = minmax_decimate(audio.y, 560)
+    if lo.min() != audio.y.min() or hi.max() != audio.y.max():
+        raise SystemExit("Min/max decimation lost the waveform's extremes")
+
+if __name__ == "__main__":
+    main()
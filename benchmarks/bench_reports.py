@@ -0,0 +1,163 @@
+"""Report throughput: per-click stylesheet rebuilds vs cached styles and bulk export.
+
+Usage:
+    python benchmarks/bench_reports.py [--reports 300] [--workers 1 2 4]
+
+Renders --reports synthetic patients' reports with:
+
+    legacy     the old generate_pdf_report body (stylesheet and table
+               styles rebuilt for every report), one process
+    cached     reports.render_report, one process
+    zip -jN    reports.export_zip with N worker processes, streamed to a file
+    combined   reports.export_combined, one multi-report PDF
+
+and prints reports per second. With reportlab's invariant mode on, the
+legacy and cached PDFs must be byte-identical (exit non-zero otherwise),
+and the zip must hold every report in input order.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+import numpy as np
+from reportlab import rl_config
+import common
+from reports import export_combined, export_zip, render_report, report_filename
+
+def legacy_report(patient_data, analysis_results):
+    """generate_pdf_report as it was before reports.py"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.units import inch
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = []
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CustomTitle', parent=styles['Heading1'],
+                              fontSize=24, spaceAfter=30))
+    story.append(Paragraph("Medical Assessment Report", styles['CustomTitle']))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("Patient Information", styles['Heading2']))
+    patient_info = [
+        ["Name:", patient_data.get('name', 'Saif')],
+        ["Age:", str(patient_data.get('age', '20')) + " years"],
+        ["Gender:", patient_data.get('gender', 'Male')],
+        ["Assessment Date:", datetime.now().strftime("%Y-%m-%d")],
+    ]
+    t = Table(patient_info, colWidths=[2*inch, 4*inch])
+    t.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 1, colors.black),
+                           ('PADDING', (0, 0), (-1, -1), 6)]))
+    story.append(t)
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Health Assessment Scores", styles['Heading2']))
+    health_scores = [
+        ["Metric", "Score"],
+        ["Voice Stability", f"{analysis_results.get('voice_stability', 0):.1f}%"],
+        ["Breathing Rate", f"{analysis_results.get('breathing_rate', 0):.1f} bpm"],
+        ["Overall Health", f"{analysis_results.get('overall_score', 0):.1f}%"]
+    ]
+    header = [('GRID', (0, 0), (-1, -1), 1, colors.black),
+              ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+              ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+              ('PADDING', (0, 0), (-1, -1), 6)]
+    t = Table(health_scores, colWidths=[3*inch, 3*inch])
+    t.setStyle(TableStyle(header))
+    story.append(t)
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Risk Assessment", styles['Heading2']))
+    risk_data = [
+        ["Condition", "Risk Level", "Recommendation"],
+        ["Respiratory Issues", "Low", "Regular monitoring"],
+        ["Voice Disorders", "Medium", "Voice therapy recommended"],
+        ["Sleep Apnea", "Low", "Follow sleep hygiene practices"],
+    ]
+    t = Table(risk_data, colWidths=[2*inch, 1.5*inch, 3*inch])
+    t.setStyle(TableStyle(header))
+    story.append(t)
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Recommendations", styles['Heading2']))
+    for rec in analysis_results.get('recommendations', [
+            "Schedule follow-up assessment", "Practice breathing exercises",
+            "Monitor voice strain levels"]):
+        story.append(Paragraph(f"• {rec}", styles['Normal']))
+        story.append(Spacer(1, 6))
+    story.append(Spacer(1, 30))
+    story.append(Paragraph("Disclaimer:", styles['Heading4']))
+    story.append(Paragraph(
+        "This report is generated based on AI-powered voice analysis and should be reviewed "
+        "by a healthcare professional. The recommendations provided are general in nature "
+        "and should not replace professional medical advice.",
+        styles['Normal']
+    ))
+    doc.build(story)
+    return buffer.getvalue()
+
+def synthetic_records(n, seed=0):
+    rng = np.random.RandomState(seed)
+    for i in range(n):
+        yield {
+            "name": f"patient_{i:05d}",
+            "patient": {"name": f"Patient {i}", "age": int(rng.randint(18, 90)),
+                        "gender": ["Female", "Male"][i % 2]},
+            "analysis": {"voice_stability": float(rng.uniform(40, 100)),
+                         "breathing_rate": float(rng.uniform(8, 30)),
+                         "overall_score": float(rng.uniform(50, 100))},
+        }
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    # Deterministic PDFs (no timestamps or random ids) so outputs compare bytewise
+    rl_config.invariant = 1
+    records = list(synthetic_records(args.reports))
+
+    legacy_pdf = legacy_report(records[0]["patient"], records[0]["analysis"])
+    cached_pdf = render_report(records[0]["patient"], records[0]["analysis"])
+
+    rows = []
+    _, seconds = timed(lambda: [legacy_report(r["patient"], r["analysis"]) for r in records])
+    rows.append(("legacy", seconds, None))
+    _, seconds = timed(lambda: [render_report(r["patient"], r["analysis"]) for r in records])
+    rows.append(("cached", seconds, None))
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            path = os.path.join(tmp, f"reports_{workers}.zip")
+            # A generator: the export never sees the whole input at once
+            _, seconds = timed(lambda: export_zip(synthetic_records(args.reports), path, workers))
+            rows.append((f"zip -j{workers}", seconds, os.path.getsize(path)))
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+            first_zipped = archive.read(names[0])
+        combined = os.path.join(tmp, "combined.pdf")
+        _, seconds = timed(lambda: export_combined(synthetic_records(args.reports), combined))
+        rows.append(("combined", seconds, os.path.getsize(combined)))
+
+    table = [{
+        "mode": name,
+        "seconds": f"{seconds:.2f}",
+        "reports_per_s": f"{args.reports / seconds:.1f}",
+        "speedup": f"{rows[0][1] / seconds:.2f}x",
+        "output_mb": f"{size / 2 ** 20:.1f}" if size else "-",
+    } for name, seconds, size in rows]
+    print(f"{args.reports} reports, {os.cpu_count()} CPUs")
+    common.print_table(table, ["mode", "seconds", "reports_per_s", "speedup", "output_mb"])
+
+    expected_names = [report_filename(r, i) for i, r in enumerate(records)]
+    if legacy_pdf != cached_pdf or first_zipped != cached_pdf or names != expected_names:
+        raise SystemExit("Cached or exported reports differ from the legacy report")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Screening results store: write throughput and per-user trend query latency.
+
+Usage:
+    python benchmarks/bench_results_store.py [--users 200] [--years 3] [--per-day 3]
+                                             [--queries 200]
+
+Fills a temporary database (never health_monitor.db) with --users users
+screened --per-day times a day for --years years, interleaved in time
+as a live deployment would write them, and reports:
+
+    per-row commits   one transaction per screening, as a naive
+                      INSERT-and-commit on every analysis would do
+                      (first 2000 rows only)
+    batched           ResultsStore.record with the background writer
+
+then the latency, for random users, of ResultsStore.history over their
+full history and over the last 90 days, and of ResultsStore.trends (the
+precomputed statistics the Trends tab reads). Exits non-zero if a
+user's history comes back incomplete or out of order, or if the
+precomputed mean disagrees with one computed from the history.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import common
+from results_store import ResultsStore, SCHEMA, INSERT
+
+TEST_TYPES = ["vowel_a", "vowel_e", "breathing", "cough", "speech_sample"]
+DAY = 86400.0
+
+def screenings(users, years, per_day, seed=0):
+    """(user_id, test_type, analysis_results, recorded_at) in time order"""
+    rng = np.random.RandomState(seed)
+    start = time.time() - years * 365 * DAY
+    slots = int(years * 365 * per_day)
+    mfcc = rng.normal(size=(13, 40))
+    features = {'mfcc': mfcc, 'spectral_centroids': rng.uniform(500, 3000, 40),
+                'zero_crossing_rate': rng.uniform(0, 0.2, 40)}
+    for slot in range(slots):
+        for user in range(users):
+            yield (f"user{user:05d}", TEST_TYPES[(slot + user) % len(TEST_TYPES)], {
+                'features': features,
+                'health_indicators': {'voice_stability': rng.uniform(50, 100),
+                                      'breathing_rate': rng.uniform(10, 25),
+                                      'duration': 5.0},
+            }, start + slot * DAY / per_day + user)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--per-day", type=float, default=3.0)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "naive.db"))
+        conn.executescript(SCHEMA)
+        naive_rows = 2000
+        start = time.perf_counter()
+        for i, (user_id, test_type, analysis, recorded_at) in enumerate(
+                screenings(args.users, args.years, args.per_day)):
+            if i == naive_rows:
+                break
+            with conn:
+                conn.execute(INSERT, (user_id, recorded_at, i, test_type, None, 5.0,
+                                      analysis['health_indicators']['voice_stability'],
+                                      analysis['health_indicators']['breathing_rate'],
+                                      None, None, None, None))
+        naive_seconds = time.perf_counter() - start
+        conn.close()
+
+        store = ResultsStore(os.path.join(tmp, "results.db"))
+        start = time.perf_counter()
+        for user_id, test_type, analysis, recorded_at in screenings(
+                args.users, args.years, args.per_day):
+            store.record(user_id, test_type, analysis, recorded_at=recorded_at)
+        store.flush()
+        batched_seconds = time.perf_counter() - start
+        total = store.count()
+        db_mb = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)
+                    if name.startswith("results.db")) / 2 ** 20
+
+        print(f"{total:,} screenings of {args.users} users over {args.years:g} years "
+              f"({db_mb:.0f} MB on disk)")
+        common.print_table([
+            {"writes": "per-row commits", "rows": naive_rows,
+             "rows_per_s": f"{naive_rows / naive_seconds:,.0f}"},
+            {"writes": "batched", "rows": total,
+             "rows_per_s": f"{total / batched_seconds:,.0f}"},
+        ], ["writes", "rows", "rows_per_s"])
+
+        rng = np.random.RandomState(1)
+        users = [f"user{u:05d}" for u in rng.randint(0, args.users, args.queries)]
+        now = time.time()
+        rows = []
+        queries = [
+            ("full history", lambda user: len(store.history(user)['recorded_at'])),
+            ("last 90 days",
+             lambda user: len(store.history(user, since=now - 90 * DAY)['recorded_at'])),
+            ("trends", lambda user: sum(len(m) for m in store.trends(user).values())),
+        ]
+        for label, run in queries:
+            sizes = []
+
+            def query():
+                sizes.append(run(users[len(sizes) % len(users)]))
+
+            stats = common.time_call(query, repeat=args.queries, warmup=0)
+            rows.append({"query": label, "rows": f"{np.mean(sizes):,.0f}",
+                         "p50_ms": f"{stats['p50_ms']:.2f}",
+                         "p95_ms": f"{stats['p95_ms']:.2f}"})
+        common.print_table(rows, ["query", "rows", "p50_ms", "p95_ms"])
+
+        history = store.history(users[0], columns=("voice_stability", "test_type"))
+        expected = store.count(users[0])
+        trends = store.trends(users[0])
+        store.close()
+    if len(history['recorded_at']) != expected or np.any(np.diff(history['recorded_at']) < 0):
+        raise SystemExit("History query returned an incomplete or unordered history")
+    for test_type, metrics in trends.items():
+        values = history['voice_stability'][history['test_type'] == test_type]
+        if not np.isclose(metrics['voice_stability']['mean'], values.mean()):
+            raise SystemExit(f"Precomputed {test_type} mean differs from the history's")
+
+if __name__ == "__main__":
+    main()
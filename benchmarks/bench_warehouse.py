@@ -0,0 +1,114 @@
+"""Feature warehouse: append throughput and cohort query time vs reading everything with pandas.
+
+Usage:
+    python benchmarks/bench_warehouse.py [--rows 2000000] [--days 365] [--users 20000]
+
+Appends --rows synthetic screenings (every warehouse column filled) to a
+temporary warehouse, one day per append as a daily sync would, then
+times cohort queries:
+
+    naive        pandas.read_parquet of the whole warehouse, then groupby
+    by test      mean/std/... of two metrics per test type, all dates
+    one quarter  one test type over 90 days, per month (partition pruning)
+    predicate    voice_stability < 60 per test type (filter pushdown)
+    one user     one user's screenings per month; daily files are one row
+                 group, so this still scans every file (per-user history
+                 is what results_store is for)
+
+Exits non-zero if the warehouse and pandas aggregates disagree.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import common
+from feature_warehouse import FeatureWarehouse, METRIC_COLUMNS
+
+TEST_TYPES = ["vowel_a", "vowel_e", "breathing", "cough", "speech_sample"]
+DAY = 86400
+
+def day_frame(day, rows, users, rng, start):
+    frame = pd.DataFrame(rng.standard_normal((rows, len(METRIC_COLUMNS))).astype(np.float32),
+                         columns=METRIC_COLUMNS)
+    frame["voice_stability"] = rng.uniform(40, 100, rows).astype(np.float32)
+    frame["breathing_rate"] = rng.uniform(8, 30, rows).astype(np.float32)
+    frame["user_id"] = [f"user{u:06d}" for u in rng.randint(0, users, rows)]
+    frame["test_type"] = np.array(TEST_TYPES)[rng.randint(0, len(TEST_TYPES), rows)]
+    frame["recorded_at"] = start + day * DAY + np.sort(rng.uniform(0, DAY, rows))
+    frame["screening_id"] = np.arange(day * rows, (day + 1) * rows)
+    return frame
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--users", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = np.random.RandomState(0)
+    per_day = args.rows // args.days
+    start = 1_704_067_200  # 2024-01-01 UTC
+
+    with tempfile.TemporaryDirectory() as tmp:
+        warehouse = FeatureWarehouse(os.path.join(tmp, "warehouse"))
+        append_seconds = 0.0
+        for day in range(args.days):
+            frame = day_frame(day, per_day, args.users, rng, start)
+            _, seconds = timed(lambda: warehouse.append(frame))
+            append_seconds += seconds
+        total = warehouse.dataset().count_rows()
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, files in os.walk(warehouse.path) for name in files)
+        print(f"{total:,} screenings, {len(warehouse.partitions())} partitions, "
+              f"{size / 2 ** 20:.0f} MB; appended at {total / append_seconds:,.0f} rows/s")
+
+        metrics = ["voice_stability", "breathing_rate"]
+        user = f"user{rng.randint(args.users):06d}"
+
+        def naive():
+            frame = pd.read_parquet(warehouse.path)
+            return frame.groupby("test_type", observed=True)[metrics].agg(
+                ["count", "mean", "std", "min", "max"])
+
+        queries = [
+            ("naive", naive),
+            ("by test", lambda: warehouse.cohort_aggregates(metrics)),
+            ("one quarter", lambda: warehouse.cohort_aggregates(
+                metrics, ("month",), start="2024-04-01", end="2024-07-01",
+                test_types=["vowel_a"])),
+            ("predicate", lambda: warehouse.cohort_aggregates(
+                metrics, where=pc.field("voice_stability") < 60)),
+            ("one user", lambda: warehouse.cohort_aggregates(
+                metrics, ("month",), user_ids=[user])),
+        ]
+        rows = []
+        results = {}
+        for name, query in queries:
+            results[name], seconds = timed(query)
+            rows.append({"query": name, "seconds": f"{seconds:.2f}",
+                         "rows_per_s": f"{total / seconds:,.0f}",
+                         "groups": len(results[name])})
+        common.print_table(rows, ["query", "seconds", "rows_per_s", "groups"])
+
+    expected = results["naive"]
+    got = results["by test"].set_index("test_type")
+    for metric in metrics:
+        for agg, column in (("mean", "mean"), ("std", "stddev"), ("count", "count")):
+            # pandas' std is the sample std; Arrow's stddev defaults to population
+            want = expected[metric][agg].sort_index().to_numpy(dtype=np.float64)
+            have = got[f"{metric}_{column}"].sort_index().to_numpy(dtype=np.float64)
+            if agg == "std":
+                counts = expected[metric]["count"].sort_index().to_numpy()
+                have = have * np.sqrt(counts / (counts - 1))
+            if not np.allclose(want, have, rtol=1e-4):
+                raise SystemExit(f"Warehouse {metric} {agg} differs from pandas")
+
+if __name__ == "__main__":
+    main()
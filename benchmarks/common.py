@@ -0,0 +1,38 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+import os
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(ROOT, "models")
+MODEL_PATH = os.path.join(MODELS_DIR, "random_forest_model.pkl")
+
+# Make the app modules (repo root) and the Parkinson's modules importable
+for path in (ROOT, MODELS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+def time_call(fn, repeat=20, warmup=1):
+    """Run fn repeatedly and return wall-clock stats in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+    }
+
+def print_table(rows, columns):
+    """Print a list of dicts as an aligned text table"""
+    widths = [max(len(col), *(len(f"{row[col]}") for row in rows)) for col in columns]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(f"{row[col]}".ljust(w) for col, w in zip(columns, widths)))
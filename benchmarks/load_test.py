@@ -0,0 +1,109 @@
+"""Load test for the scoring service (models/service.py).
+
+Usage:
+    python models/service.py --port 8000 &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --requests 200 --concurrency 8
+    python benchmarks/load_test.py --batch 8 --requests 50
+
+Sends synthetic sustained vowels from --concurrency client threads and
+reports p50/p95/p99 latency and throughput, plus how many requests were
+shed with 503 or failed. Exits non-zero if any request got an unexpected
+status.
+"""
+import argparse
+import http.client
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import numpy as np
+import common
+from synthetic import sustained_vowel, to_wav_bytes
+
+def make_recordings(count, duration, sr):
+    return [to_wav_bytes(sustained_vowel(duration, sr, f0=100 + 10 * i, seed=i), sr)
+            for i in range(count)]
+
+def multipart_body(recordings):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for i, audio_bytes in enumerate(recordings):
+        parts.append(f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+                     f"filename=\"sample_{i}.wav\"\r\nContent-Type: audio/wav\r\n\r\n".encode())
+        parts.append(audio_bytes)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+class Client:
+    """One keep-alive connection per client thread"""
+
+    def __init__(self, url):
+        self.url = urlsplit(url)
+        self.local = threading.local()
+
+    def post(self, path, body, content_type):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.url.hostname, self.url.port,
+                                                                timeout=300)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body, {"Content-Type": content_type})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            status = 0
+        return status, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=0,
+                        help="files per /score/batch request (0 sends single /score requests)")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per recording")
+    parser.add_argument("--sr", type=int, default=22050)
+    args = parser.parse_args()
+
+    recordings = make_recordings(max(args.batch, 8), args.duration, args.sr)
+    if args.batch:
+        body, content_type = multipart_body(recordings[:args.batch])
+        payloads = [("/score/batch", body, content_type)]
+    else:
+        payloads = [("/score", audio_bytes, "audio/wav") for audio_bytes in recordings]
+
+    client = Client(args.url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda i: client.post(*payloads[i % len(payloads)]),
+                                range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    statuses = np.array([status for status, _ in results])
+    latencies = np.array([ms for status, ms in results if status == 200])
+    files_per_request = args.batch or 1
+    row = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "ok": int((statuses == 200).sum()),
+        "shed_503": int((statuses == 503).sum()),
+        "failed": int(((statuses != 200) & (statuses != 503)).sum()),
+        "p50_ms": f"{np.percentile(latencies, 50):.1f}" if len(latencies) else "-",
+        "p95_ms": f"{np.percentile(latencies, 95):.1f}" if len(latencies) else "-",
+        "p99_ms": f"{np.percentile(latencies, 99):.1f}" if len(latencies) else "-",
+        "req_per_s": f"{len(latencies) / elapsed:.2f}",
+        "files_per_s": f"{len(latencies) * files_per_request / elapsed:.2f}",
+    }
+    common.print_table([row], list(row))
+
+    if row["failed"]:
+        raise SystemExit(f"{row['failed']} requests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Deterministic synthetic voice recordings for benchmarks."""
+import io
+import wave
+import numpy as np
+from scipy.signal import lfilter
+
+# First three formants of /a/ (Hz) and their bandwidths
+VOWEL_FORMANTS = [(700, 110), (1220, 120), (2600, 160)]
+
+def sustained_vowel(duration=3.0, sr=22050, f0=120.0, jitter=0.005, shimmer=0.03, seed=0):
+    """Glottal pulse train through formant resonators
+
+    jitter and shimmer are the relative standard deviations of the
+    period-to-period length and amplitude perturbations.
+    """
+    rng = np.random.RandomState(seed)
+    n = int(duration * sr)
+    source = np.zeros(n)
+    t = 0.0
+    while t < duration:
+        index = int(t * sr)
+        if index >= n:
+            break
+        source[index] = 1.0 + shimmer * rng.randn()
+        t += (1.0 + jitter * rng.randn()) / f0
+
+    y = source
+    for freq, bandwidth in VOWEL_FORMANTS:
+        r = np.exp(-np.pi * bandwidth / sr)
+        theta = 2 * np.pi * freq / sr
+        y = lfilter([1 - r], [1, -2 * r * np.cos(theta), r * r], y)
+
+    y = 0.8 * y / np.max(np.abs(y)) + 0.002 * rng.randn(n)
+    return np.clip(y, -1, 1).astype(np.float32)
+
+def to_wav_bytes(y, sr):
+    """Encode a float signal in [-1, 1] as 16-bit mono WAV bytes"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes((np.clip(y, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+def write_wav(path, y, sr):
+    with open(path, "wb") as f:
+        f.write(to_wav_bytes(y, sr))
+    return path
+
+def breathing(duration=20.0, sr=22050, breaths_per_minute=15.0, seed=0):
+    """Band-limited noise bursts, one inhale/exhale cycle per breath"""
+    rng = np.random.RandomState(seed)
+    n = int(duration * sr)
+    t = np.arange(n) / sr
+    # Each breath is two bursts (inhale, exhale): |sin| at half the breath rate
+    gate = np.abs(np.sin(np.pi * breaths_per_minute / 60 * t)) ** 4
+    noise = lfilter([1.0], [1.0, -0.9], rng.randn(n))
+    y = noise * gate
+    return (0.5 * y / np.max(np.abs(y))).astype(np.float32)
+
+def cough(duration=5.0, sr=22050, coughs=3, seed=0):
+    """Explosive noise bursts with a short voiced tail, evenly spaced"""
+    rng = np.random.RandomState(seed)
+    n = int(duration * sr)
+    y = np.zeros(n)
+    burst = int(0.35 * sr)
+    t = np.arange(burst) / sr
+    # Sharp attack, ~80 ms decay; the tail is a brief glottal buzz at 200 Hz
+    envelope = (1 - np.exp(-t / 0.005)) * np.exp(-t / 0.08)
+    noise = lfilter([1.0], [1.0, -0.6], rng.randn(burst))
+    buzz = 0.3 * np.sign(np.sin(2 * np.pi * 200 * t)) * np.exp(-t / 0.15)
+    for i in range(coughs):
+        start = int((i + 0.5) * n / coughs) - burst // 2
+        if 0 <= start and start + burst <= n:
+            y[start:start + burst] += envelope * (noise + buzz) * rng.uniform(0.7, 1.0)
+    y += 0.002 * rng.randn(n)
+    return (0.9 * y / np.max(np.abs(y))).astype(np.float32)
+
+# Recording kinds of the benchmark corpus: name -> generator(duration, sr, seed)
+CORPUS_KINDS = {
+    "vowel": lambda duration, sr, seed: sustained_vowel(duration, sr, seed=seed),
+    "vowel_perturbed": lambda duration, sr, seed: sustained_vowel(
+        duration, sr, f0=140.0, jitter=0.02, shimmer=0.12, seed=seed),
+    "breathing": lambda duration, sr, seed: breathing(duration, sr, seed=seed),
+    "cough": lambda duration, sr, seed: cough(duration, sr, coughs=max(3, int(duration // 5)),
+                                               seed=seed),
+}
+
+def corpus(durations=(3.0, 10.0, 30.0, 60.0), rates=(22050, 44100), kinds=None, seed=0):
+    """Yield (name, samples, sr) for every kind x duration x rate, deterministically"""
+    for kind in kinds or CORPUS_KINDS:
+        for duration in durations:
+            for sr in rates:
+                name = f"{kind}_{duration:g}s_{sr // 1000}k"
+                yield name, CORPUS_KINDS[kind](duration, sr, seed), sr
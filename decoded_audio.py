@@ -0,0 +1,72 @@
+import functools
+import numpy as np
+import librosa
+from pcm_buffer import PCMBuffer
+from envelope import compute_envelope, breathing_rate_from_envelope, stability_from_std
+
+class DecodedAudio:
+    """A recording decoded once, with its transforms computed on first use
+
+    Holds the resampled float32 signal; the STFT magnitude, mel spectrogram,
+    MFCC, spectral centroid, zero-crossing rate and envelope are memoized,
+    so analysis and plotting share one decode and one STFT.
+    """
+
+    def __init__(self, y, sr, n_fft=2048, hop_length=512):
+        self.y = np.asarray(y, dtype=np.float32)
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+
+    @classmethod
+    def from_bytes(cls, audio_bytes, sr=22050):
+        """Decode WAV bytes (or a PCMBuffer) to mono float32 at sr"""
+        buffer = audio_bytes if isinstance(audio_bytes, PCMBuffer) else PCMBuffer.from_wav_bytes(audio_bytes)
+        return cls(buffer.samples(sr), sr)
+
+    @property
+    def duration(self):
+        return len(self.y) / self.sr
+
+    @functools.cached_property
+    def magnitude(self):
+        """|STFT|, shape (1 + n_fft // 2, frames)"""
+        return np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length))
+
+    @functools.cached_property
+    def mel_spectrogram(self):
+        return librosa.feature.melspectrogram(S=self.magnitude ** 2, sr=self.sr)
+
+    @functools.cached_property
+    def mfcc(self):
+        return librosa.feature.mfcc(S=librosa.power_to_db(self.mel_spectrogram), n_mfcc=13)
+
+    @functools.cached_property
+    def spectral_centroids(self):
+        return librosa.feature.spectral_centroid(S=self.magnitude, sr=self.sr,
+                                                 n_fft=self.n_fft, hop_length=self.hop_length)[0]
+
+    @functools.cached_property
+    def zero_crossing_rate(self):
+        return librosa.feature.zero_crossing_rate(self.y, frame_length=self.n_fft,
+                                                  hop_length=self.hop_length)[0]
+
+    @functools.cached_property
+    def envelope(self):
+        return compute_envelope(self.y, self.sr)
+
+    def analysis(self):
+        """Health indicators and voice features, in the shape app.analyze_audio returns"""
+        return {
+            'features': {
+                'mfcc': self.mfcc,
+                'spectral_centroids': self.spectral_centroids,
+                'zero_crossing_rate': self.zero_crossing_rate
+            },
+            'health_indicators': {
+                'breathing_rate': breathing_rate_from_envelope(self.envelope.values,
+                                                               self.envelope.rate),
+                'voice_stability': stability_from_std(self.envelope.std),
+                'duration': self.duration
+            }
+        }
@@ -0,0 +1,134 @@
+"""Amplitude envelope shared by the breathing-rate and voice-stability estimates.
+
+The envelope is computed once per recording, in a single pass that also
+accumulates its full-rate statistics, and is then low-passed and decimated
+to ENVELOPE_RATE. Breathing is a sub-1 Hz phenomenon, so peak picking on
+the decimated envelope scans a few hundred points per 10 s instead of
+hundreds of thousands. The breathing estimate smooths that envelope
+further, to BREATH_BAND_HZ, so the flutter of the noise inside one breath
+is not counted as breaths, and takes peaks at least MIN_BREATH_SECONDS
+apart. The same EnvelopeFollower serves whole recordings
+(compute_envelope) and chunked streams (audio_stream.StreamingAnalyzer).
+"""
+import numpy as np
+from scipy.signal import butter, find_peaks, oaconvolve, sosfilt, sosfilt_zi, sosfiltfilt
+
+# Envelope rate used for the breathing and stability estimates; breathing is
+# well below 1 Hz, so 50 Hz leaves plenty of headroom
+ENVELOPE_RATE = 50
+
+# Breathing estimate: envelope low-pass (1 Hz is 60 breaths per minute),
+# shortest breath counted (40 per minute, above the 30 bpm cap), and the
+# least prominence of a breath relative to the loudest
+BREATH_BAND_HZ = 1.0
+MIN_BREATH_SECONDS = 1.5
+BREATH_PROMINENCE = 0.2
+MAX_BREATHING_RATE = 30
+
+# Half-length of the FIR Hilbert transformer; at 22050 Hz the response is
+# flat from roughly 60 Hz up, below the lowest voice fundamental analysed
+HILBERT_HALF_TAPS = 200
+
+def hilbert_fir(half_taps=HILBERT_HALF_TAPS):
+    """Windowed ideal Hilbert transformer, 2 * half_taps + 1 taps"""
+    n = np.arange(-half_taps, half_taps + 1)
+    taps = np.zeros(len(n))
+    odd = n % 2 == 1
+    taps[odd] = 2 / (np.pi * n[odd])
+    return taps * np.blackman(len(n))
+
+class EnvelopeFollower:
+    """Streaming amplitude envelope of a signal arriving in chunks
+
+    The analytic envelope sqrt(x^2 + H(x)^2) is computed with an FIR Hilbert
+    transformer instead of a whole-signal FFT, so it can be produced chunk by
+    chunk (delayed by HILBERT_HALF_TAPS samples). Its running mean and
+    variance are tracked at full rate; a low-passed copy is decimated to
+    ENVELOPE_RATE for the breathing estimate. Filter state is carried
+    between chunks, so feeding a signal in pieces gives the same envelope as
+    feeding it whole.
+    """
+
+    def __init__(self, sr, rate=ENVELOPE_RATE):
+        self.taps = hilbert_fir()
+        self.history = np.zeros(len(self.taps) - 1, dtype=np.float64)
+        self.step = max(1, int(round(sr / rate)))
+        self.rate = sr / self.step
+        self.sos = butter(4, 0.8 * self.rate / 2, fs=sr, output="sos")
+        self.zi = None
+        self.phase = 0
+        # Running count, mean and sum of squared deviations of the envelope
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def process(self, chunk):
+        """Feed samples; return the new envelope samples at self.rate"""
+        if len(chunk) == 0:
+            return np.empty(0, dtype=np.float64)
+        padded = np.concatenate([self.history, chunk])
+        self.history = padded[len(padded) - len(self.history):]
+        delay = len(self.taps) // 2
+        quadrature = oaconvolve(padded, self.taps, mode="valid")
+        in_phase = padded[delay:delay + len(quadrature)]
+        envelope = np.sqrt(in_phase ** 2 + quadrature ** 2)
+        self._update_stats(envelope)
+
+        if self.zi is None:
+            self.zi = sosfilt_zi(self.sos) * envelope[0]
+        smoothed, self.zi = sosfilt(self.sos, envelope, zi=self.zi)
+        decimated = smoothed[self.phase::self.step]
+        self.phase = (self.phase - len(envelope)) % self.step
+        return decimated
+
+    def _update_stats(self, envelope):
+        # Merge the chunk's mean/variance into the running totals (Chan et al.)
+        count = len(envelope)
+        if count == 0:
+            return
+        mean = envelope.mean()
+        m2 = np.sum((envelope - mean) ** 2)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else 0.0
+
+class Envelope:
+    """Decimated envelope of a whole recording plus its full-rate spread"""
+
+    def __init__(self, values, rate, std):
+        self.values = values
+        self.rate = rate
+        self.std = std
+
+def compute_envelope(y, sr, rate=ENVELOPE_RATE):
+    """Envelope of a complete signal, computed in one pass"""
+    follower = EnvelopeFollower(sr, rate)
+    values = follower.process(np.asarray(y, dtype=np.float64))
+    return Envelope(values, follower.rate, follower.std)
+
+def breathing_rate_from_envelope(values, rate):
+    """Breaths per minute from envelope peaks, capped at MAX_BREATHING_RATE"""
+    values = np.asarray(values, dtype=np.float64)
+    sos = butter(2, BREATH_BAND_HZ, fs=rate, output="sos")
+    # sosfiltfilt needs a few filter lengths of input; that is well under
+    # the two breaths a rate needs anyway
+    if len(values) < 2 * MIN_BREATH_SECONDS * rate or values.max() <= 0:
+        return 0
+    smoothed = sosfiltfilt(sos, values)
+    peaks, _ = find_peaks(smoothed, distance=max(1, int(MIN_BREATH_SECONDS * rate)),
+                          prominence=BREATH_PROMINENCE * smoothed.max())
+    if len(peaks) > 1:
+        breathing_rate = 60 / (np.mean(np.diff(peaks)) / rate)
+        return min(breathing_rate, MAX_BREATHING_RATE)
+    return 0
+
+def stability_from_std(std):
+    """Voice stability score from the envelope spread, capped at 100"""
+    stability = 1.0 / (std + 1e-6)
+    return min(stability * 10, 100)
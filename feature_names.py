@@ -0,0 +1,16 @@
+"""Column order of the Parkinson's voice feature vector.
+
+models/features.extract_features returns its 22 values in this order,
+which matches the training data in main.ipynb, with the unused "status"
+slot at index 16. It lives at the repository root, without heavy
+imports, so the results store can name the stored vectors from the same
+list.
+"""
+
+FEATURE_NAMES = [
+    "MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)",
+    "MDVP:Jitter(Abs)", "MDVP:RAP", "MDVP:PPQ", "Jitter:DDP",
+    "MDVP:Shimmer", "MDVP:Shimmer(dB)", "Shimmer:APQ3", "Shimmer:APQ5",
+    "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR",
+    "status", "DFA", "spread1", "spread2", "D2", "PPE"
+]
@@ -0,0 +1,322 @@
+"""Columnar warehouse of screening features for population-level analytics.
+
+Usage:
+    python feature_warehouse.py sync warehouse/ [--db health_monitor.db]
+    python feature_warehouse.py compact warehouse/
+    python feature_warehouse.py query warehouse/ --metrics voice_stability HNR
+                                     [--group-by month test_type] [--start 2026-01-01]
+                                     [--end 2026-07-01] [--test-types vowel_a]
+
+The warehouse is a directory of Parquet files, Hive-partitioned by UTC
+date and test type:
+
+    warehouse/date=2026-10-18/test_type=vowel_a/part-<token>-0.parquet
+
+Each row is one screening: user_id, recorded_at, screening_id, the app.py
+health indicators, the Parkinson's prediction and score, the app.py voice
+feature summaries and the 21 Parkinson's features (float32, null where a
+screening did not measure them). Rows are sorted by user and time within
+a file, and files are zstd-compressed.
+
+append() stages new files under _staging/ and renames them into their
+partitions, so a reader never sees a half-written file. sync() appends the
+screenings stored in the results database since the last sync, paging on
+screening_id: the results store assigns ids in commit order, so a row
+committed after a sync (however old its recorded_at) has a higher id than
+any the sync saw. Before each batch, sync records it as pending in
+_sync.json and names its files after it; a sync or compact() following a
+crash deletes a pending batch's files and the batch is appended again, so
+no screening lands twice. Frequent syncs leave many small files, which
+compact() merges per partition.
+
+cohort_aggregates() reads only the columns it aggregates or groups by,
+skips whole partitions outside the date and test-type filters, and
+pushes other predicates down to Parquet row-group statistics. Grouping
+runs in Arrow's multithreaded engine, not in pandas.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+import urllib.parse
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from results_store import (DEFAULT_DB_PATH, COLUMNS as STORE_COLUMNS, VOICE_FEATURE_NAMES,
+                           PARKINSONS_FEATURE_NAMES)
+
+PARKINSONS_COLUMNS = [name for name in PARKINSONS_FEATURE_NAMES if name is not None]
+INDICATOR_COLUMNS = ["duration", "voice_stability", "breathing_rate", "parkinsons_score"]
+METRIC_COLUMNS = INDICATOR_COLUMNS + VOICE_FEATURE_NAMES + PARKINSONS_COLUMNS
+
+SCHEMA = pa.schema(
+    [("user_id", pa.string()),
+     ("recorded_at", pa.timestamp("ms", tz="UTC")),
+     ("screening_id", pa.int64()),
+     ("audio_sha256", pa.string()),
+     ("parkinsons_prediction", pa.int8())]
+    + [(name, pa.float32()) for name in METRIC_COLUMNS]
+)
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("test_type", pa.string())]),
+                               flavor="hive")
+
+STAGING_DIR = "_staging"
+SYNC_STATE = "_sync.json"
+ROW_GROUP_SIZE = 128 * 1024
+AGGREGATIONS = ("count", "mean", "stddev", "min", "max")
+
+def to_table(frame):
+    """Arrow table in SCHEMA plus date and test_type, from a DataFrame of screenings
+
+    recorded_at may be Unix seconds or datetimes; missing columns and NaN
+    values become nulls.
+    """
+    recorded_at = frame["recorded_at"]
+    if not pd.api.types.is_datetime64_any_dtype(recorded_at):
+        recorded_at = pd.to_datetime(recorded_at, unit="s", utc=True)
+    elif recorded_at.dt.tz is None:
+        recorded_at = recorded_at.dt.tz_localize("UTC")
+    recorded_at = recorded_at.dt.floor("ms")
+    n = len(frame)
+    columns = {}
+    for field in SCHEMA:
+        if field.name == "recorded_at":
+            columns[field.name] = pa.array(recorded_at, type=field.type)
+        elif field.name in frame:
+            columns[field.name] = pa.array(frame[field.name], type=field.type, from_pandas=True)
+        else:
+            columns[field.name] = pa.nulls(n, type=field.type)
+    columns["date"] = pa.array(recorded_at.dt.strftime("%Y-%m-%d"), type=pa.string())
+    columns["test_type"] = pa.array(frame["test_type"].astype(str), type=pa.string())
+    return pa.table(columns)
+
+class FeatureWarehouse:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def dataset(self):
+        # Files and directories starting with "_" (staging, sync state) are ignored
+        return ds.dataset(self.path, format="parquet", partitioning=PARTITIONING,
+                          schema=pa.unify_schemas([SCHEMA, PARTITIONING.schema]))
+
+    def append(self, frame, token=None):
+        """Write a DataFrame of screenings into its date/test-type partitions; returns the row count"""
+        if len(frame) == 0:
+            return 0
+        table = to_table(frame).sort_by([("user_id", "ascending"), ("recorded_at", "ascending")])
+        self._write(table, token)
+        return table.num_rows
+
+    def _write(self, table, token=None):
+        token = token or f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(self.path, STAGING_DIR, token)
+        ds.write_dataset(
+            table, staging, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{token}-{{i}}.parquet",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+            max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(ROW_GROUP_SIZE, 1024),
+        )
+        written = []
+        for root, _, files in os.walk(staging):
+            partition = os.path.join(self.path, os.path.relpath(root, staging))
+            for name in files:
+                os.makedirs(partition, exist_ok=True)
+                target = os.path.join(partition, name)
+                os.replace(os.path.join(root, name), target)
+                written.append(target)
+        shutil.rmtree(staging, ignore_errors=True)
+        return written
+
+    def partitions(self):
+        """Partition directories (relative paths) holding data files"""
+        partitions = []
+        for root, dirs, files in os.walk(self.path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(("_", ".")))
+            if any(name.endswith(".parquet") for name in files):
+                partitions.append(os.path.relpath(root, self.path))
+        return partitions
+
+    def compact(self, min_files=2):
+        """Merge each partition's files into one; returns the number of partitions rewritten"""
+        # A crashed sync's partial batch must not be merged out of reach
+        self._discard_pending(self._sync_state())
+        rewritten = 0
+        for partition in self.partitions():
+            directory = os.path.join(self.path, partition)
+            files = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                           if name.endswith(".parquet"))
+            if len(files) < min_files:
+                continue
+            table = pa.concat_tables(pq.read_table(f, schema=SCHEMA) for f in files)
+            table = table.sort_by([("user_id", "ascending"), ("recorded_at", "ascending")])
+            # Partition values are URI-encoded in directory names
+            date, test_type = (urllib.parse.unquote(part.split("=", 1)[1])
+                               for part in partition.split(os.sep))
+            table = table.append_column("date", pa.array([date] * table.num_rows, pa.string()))
+            table = table.append_column("test_type",
+                                        pa.array([test_type] * table.num_rows, pa.string()))
+            # The merged file lands before the old ones go; a reader in between
+            # may count those rows twice, never zero times
+            self._write(table)
+            for f in files:
+                os.remove(f)
+            rewritten += 1
+        return rewritten
+
+    def _sync_state(self):
+        try:
+            with open(os.path.join(self.path, SYNC_STATE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_sync_state(self, state):
+        path = os.path.join(self.path, SYNC_STATE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _discard_pending(self, state):
+        """Delete the files of batches a sync started but did not finish"""
+        pending = [entry.pop("pending") for entry in state.values() if "pending" in entry]
+        if not pending:
+            return
+        prefixes = tuple(f"part-{token}-" for token in pending)
+        for root, dirs, files in os.walk(self.path):
+            for name in files:
+                if name.startswith(prefixes):
+                    os.remove(os.path.join(root, name))
+        for token in pending:
+            shutil.rmtree(os.path.join(self.path, STAGING_DIR, token), ignore_errors=True)
+        self._save_sync_state(state)
+
+    def sync(self, db_path=DEFAULT_DB_PATH, batch_rows=100_000, progress=None):
+        """Append the results store's screenings stored since the last sync; returns the count
+
+        Reads in screening_id order in batches; the last synced id is saved
+        after every batch, so an interrupted sync resumes where it stopped.
+        """
+        state = self._sync_state()
+        self._discard_pending(state)
+        entry = state.setdefault(db_path, {"screening_id": 0})
+        source = hashlib.sha1(os.path.abspath(db_path).encode()).hexdigest()[:8]
+        conn = sqlite3.connect(db_path, timeout=10.0)
+        total = 0
+        try:
+            while True:
+                rows = conn.execute(
+                    f"SELECT {', '.join(STORE_COLUMNS)} FROM screenings "
+                    f"WHERE screening_id > ? ORDER BY screening_id LIMIT ?",
+                    (entry["screening_id"], batch_rows)).fetchall()
+                if not rows:
+                    break
+                entry["pending"] = token = f"sync-{source}-{entry['screening_id']}"
+                self._save_sync_state(state)
+                total += self.append(screenings_frame(rows), token)
+                entry["screening_id"] = rows[-1][STORE_COLUMNS.index("screening_id")]
+                del entry["pending"]
+                self._save_sync_state(state)
+                if progress is not None:
+                    progress(total)
+        finally:
+            conn.close()
+        return total
+
+    def cohort_aggregates(self, metrics, group_by=("test_type",), start=None, end=None,
+                          test_types=None, user_ids=None, where=None, aggregations=AGGREGATIONS):
+        """DataFrame of aggregations of metrics per group
+
+        group_by may name any column, plus "month" (YYYY-MM of the
+        screening date). start and end are inclusive and exclusive ISO
+        dates. where is an extra pyarrow.compute expression, e.g.
+        pc.field("voice_stability") < 60.
+        """
+        unknown = set(metrics) - set(METRIC_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+        keys = ["date" if key == "month" else key for key in group_by]
+        predicate = []
+        if start is not None:
+            predicate.append(pc.field("date") >= str(start))
+        if end is not None:
+            predicate.append(pc.field("date") < str(end))
+        if test_types is not None:
+            predicate.append(pc.field("test_type").isin(list(test_types)))
+        if user_ids is not None:
+            predicate.append(pc.field("user_id").isin([str(u) for u in user_ids]))
+        if where is not None:
+            predicate.append(where)
+        expression = None
+        for term in predicate:
+            expression = term if expression is None else expression & term
+        columns = list(dict.fromkeys(list(metrics) + keys))
+        table = self.dataset().to_table(columns=columns, filter=expression)
+        if "month" in group_by:
+            table = table.append_column("month", pc.utf8_slice_codeunits(table["date"], 0, 7))
+        result = table.group_by(list(group_by)).aggregate(
+            [(name, agg) for name in metrics for agg in aggregations])
+        frame = result.to_pandas()
+        return frame.sort_values(list(group_by)).reset_index(drop=True) if group_by else frame
+
+def screenings_frame(rows):
+    """DataFrame of warehouse columns from results store rows (results_store.COLUMNS)"""
+    frame = pd.DataFrame.from_records(rows, columns=STORE_COLUMNS)
+    for blob_column, names in (("voice_features", VOICE_FEATURE_NAMES),
+                               ("parkinsons_features", PARKINSONS_FEATURE_NAMES)):
+        matrix = np.full((len(frame), len(names)), np.nan, dtype=np.float32)
+        for i, blob in enumerate(frame.pop(blob_column)):
+            if blob is not None:
+                values = np.frombuffer(blob, dtype=np.float32)
+                matrix[i, :len(values)] = values[:len(names)]
+        for j, name in enumerate(names):
+            if name is not None:
+                frame[name] = matrix[:, j]
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = commands.add_parser("sync", help="append new screenings from the results store")
+    sync_parser.add_argument("warehouse")
+    sync_parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    compact_parser = commands.add_parser("compact", help="merge each partition's files")
+    compact_parser.add_argument("warehouse")
+    query_parser = commands.add_parser("query", help="cohort aggregates as CSV on stdout")
+    query_parser.add_argument("warehouse")
+    query_parser.add_argument("--metrics", nargs="+", default=["voice_stability", "breathing_rate"])
+    query_parser.add_argument("--group-by", nargs="*", default=["test_type"])
+    query_parser.add_argument("--start", help="first date (YYYY-MM-DD)")
+    query_parser.add_argument("--end", help="date after the last one (YYYY-MM-DD)")
+    query_parser.add_argument("--test-types", nargs="+")
+    args = parser.parse_args()
+
+    warehouse = FeatureWarehouse(args.warehouse)
+    start = time.perf_counter()
+    if args.command == "sync":
+        def report(done):
+            print(f"\r{done} screenings", end="", file=sys.stderr, flush=True)
+        count = warehouse.sync(args.db, progress=report)
+        print(file=sys.stderr)
+        print(f"Appended {count} screenings in {time.perf_counter() - start:.1f}s")
+    elif args.command == "compact":
+        count = warehouse.compact()
+        print(f"Compacted {count} partitions in {time.perf_counter() - start:.1f}s")
+    else:
+        frame = warehouse.cohort_aggregates(args.metrics, args.group_by, args.start, args.end,
+                                            args.test_types)
+        frame.to_csv(sys.stdout, index=False)
+        print(f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
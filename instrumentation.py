@@ -0,0 +1,240 @@
+"""Per-stage timing and allocation counters for the analysis pipelines.
+
+Wrap a pipeline step in `with stage("features.dfa"):` and its wall-clock
+time is added to a histogram in the process-wide REGISTRY (fixed buckets,
+so memory does not grow with traffic); `@stage("report.pdf")` times every
+call of a function the same way. Stages may nest. When allocation
+tracking is on (track_allocations, or VOICE_TRACE_ALLOCATIONS=1) each
+stage also records the peak traced allocation above its starting point;
+tracemalloc slows Python-level allocation noticeably, so it is off by
+default and the numbers are approximate while threads allocate at once.
+
+Work done in a worker process is collected with record_stages() and
+merged into the parent's registry (see analysis_jobs and
+models/service.py), so the histograms cover the whole pipeline. The
+registry exports as a JSON-ready dict or Prometheus text.
+
+profile_call runs one call under cProfile for an opt-in, single-request
+capture: a text report plus the raw stats, which load with pstats or
+snakeviz. A sampling profiler such as py-spy can be attached to a worker
+pid from outside instead, without any code here.
+"""
+import contextlib
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Histogram upper bounds in seconds; the +Inf bucket is implicit
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROFILE_LIMIT = 30
+
+class StageStats:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.alloc_count = 0
+        self.alloc_total = 0
+        self.alloc_max = 0
+
+    def observe(self, seconds, alloc=None):
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if alloc is not None:
+            self.alloc_count += 1
+            self.alloc_total += alloc
+            self.alloc_max = max(self.alloc_max, alloc)
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating linearly inside one"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, n in zip(self.buckets + (self.max,), self.counts):
+            if n and seen + n >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+            lower = upper
+        return self.max
+
+    def as_dict(self):
+        cumulative, buckets = 0, {}
+        for upper, n in zip(self.buckets, self.counts):
+            cumulative += n
+            buckets[repr(upper)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": self.max,
+            "buckets": buckets,
+            "alloc_count": self.alloc_count,
+            "alloc_mean_bytes": self.alloc_total / self.alloc_count if self.alloc_count else 0,
+            "alloc_max_bytes": self.alloc_max,
+        }
+
+class StageRegistry:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, name, seconds, alloc=None):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats(self.buckets)
+            stats.observe(seconds, alloc)
+
+    def merge(self, samples):
+        """Add (name, seconds, alloc) samples collected by record_stages"""
+        for name, seconds, alloc in samples:
+            self.observe(name, seconds, alloc)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self):
+        """Per-stage counters as plain data, slowest stages (by total) first"""
+        with self._lock:
+            stages = {name: stats.as_dict() for name, stats in self._stages.items()}
+        return dict(sorted(stages.items(), key=lambda item: -item[1]["sum_seconds"]))
+
+    def to_prometheus(self, prefix="voice_stage"):
+        """Prometheus text exposition of the stage histograms"""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_seconds Wall-clock time per pipeline stage",
+                 f"# TYPE {prefix}_seconds histogram"]
+        for name, stats in snapshot.items():
+            label = _label_value(name)
+            for upper, cumulative in stats["buckets"].items():
+                lines.append(f'{prefix}_seconds_bucket{{stage="{label}",le="{upper}"}} {cumulative}')
+            lines.append(f'{prefix}_seconds_sum{{stage="{label}"}} {stats["sum_seconds"]!r}')
+            lines.append(f'{prefix}_seconds_count{{stage="{label}"}} {stats["count"]}')
+        lines += [f"# HELP {prefix}_alloc_peak_bytes Peak traced allocation per stage",
+                  f"# TYPE {prefix}_alloc_peak_bytes summary"]
+        for name, stats in snapshot.items():
+            if stats["alloc_count"]:
+                label = _label_value(name)
+                total = stats["alloc_mean_bytes"] * stats["alloc_count"]
+                lines.append(f'{prefix}_alloc_peak_bytes_sum{{stage="{label}"}} {total:.0f}')
+                lines.append(f'{prefix}_alloc_peak_bytes_count{{stage="{label}"}} {stats["alloc_count"]}')
+        return "\n".join(lines) + "\n"
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_gauges(values, prefix):
+    """Prometheus text for a flat dict of numbers (e.g. queue metrics)"""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines += [f"# TYPE {prefix}_{key} gauge", f"{prefix}_{key} {value!r}"]
+    return "\n".join(lines) + "\n" if lines else ""
+
+REGISTRY = StageRegistry()
+
+# Per-thread stack of open stages (for nested allocation peaks) and the
+# sample list of an active record_stages block
+_local = threading.local()
+
+def track_allocations(enabled=True):
+    """Start or stop per-stage allocation tracking in this process"""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def tracking_allocations():
+    return tracemalloc.is_tracing()
+
+if os.environ.get("VOICE_TRACE_ALLOCATIONS") == "1":
+    track_allocations()
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the block (and its peak allocation, if tracked) as one observation"""
+    tracing = tracemalloc.is_tracing()
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        # reset_peak is process-wide: fold the enclosing stage's peak so far
+        # into its frame before resetting it for this one
+        if frames:
+            frames[-1][1] = max(frames[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, 0]
+        frames.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        alloc = None
+        if tracing:
+            frames.pop()
+            peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+            alloc = max(0, peak - frame[0])
+            if frames:
+                frames[-1][1] = max(frames[-1][1], peak)
+        samples = getattr(_local, "samples", None)
+        if samples is not None:
+            samples.append((name, seconds, alloc))
+        else:
+            REGISTRY.observe(name, seconds, alloc)
+
+@contextlib.contextmanager
+def record_stages(allocations=False):
+    """Collect this thread's stage samples into a list instead of REGISTRY
+
+    Used in worker processes: the list is returned with the result and
+    merged into the parent's registry. allocations turns tracking on for
+    the block if it is not already on.
+    """
+    samples = []
+    previous = getattr(_local, "samples", None)
+    started_tracing = allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _local.samples = samples
+    try:
+        yield samples
+    finally:
+        _local.samples = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+def profile_call(fn, *args, **kwargs):
+    """Run fn under cProfile; returns (result, capture)
+
+    capture holds 'report' (the top PROFILE_LIMIT functions by cumulative
+    time, as text) and 'data' (marshalled stats in the .prof format).
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    profiler.create_stats()
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LIMIT)
+    return result, {"report": report.getvalue(), "data": marshal.dumps(profiler.stats)}
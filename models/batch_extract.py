@@ -0,0 +1,203 @@
+"""Headless batch feature extraction for archives of WAV recordings.
+
+Usage:
+    python models/batch_extract.py recordings/ -o features.parquet
+    python models/batch_extract.py manifest.txt -o features.csv --workers 8
+
+The source may also be a packed recording archive (recording_archive.py);
+its entries are read as slices of one memory-mapped sample file.
+
+Every completed file is appended to a checkpoint (<output>.partial.csv), so
+a restarted run skips the files that already finished. With --cache-dir,
+re-scoring an archive with a new --model skips the audio work for every
+recording that was extracted before.
+"""
+import argparse
+import csv
+import functools
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+# Shared modules (pcm_buffer, style, ...) live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from features import extract_features, FEATURE_NAMES, FeatureWarning
+from predict import predict_batch
+from pitch import PITCH_BACKENDS, DEFAULT_PITCH_BACKEND
+from feature_cache import FeatureCache, cached_extract_features
+from recording_archive import RecordingArchive, is_archive
+
+COLUMNS = ["path"] + FEATURE_NAMES + ["error", "warnings"]
+
+def find_recordings(source):
+    """List WAV paths from a directory (recursive) or a manifest file,
+    or entry names from a recording archive"""
+    if is_archive(source):
+        return RecordingArchive(source).names
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(".wav"):
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    if source.lower().endswith(".csv"):
+        paths = pd.read_csv(source)["path"].astype(str).tolist()
+    else:
+        with open(source) as f:
+            paths = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Manifest entries are relative to the manifest itself
+    return [p if os.path.isabs(p) else os.path.join(base, p) for p in paths]
+
+@functools.lru_cache(maxsize=None)
+def open_archive(archive_path):
+    """One memory map per worker process, reused for every entry"""
+    return RecordingArchive(archive_path)
+
+@functools.lru_cache(maxsize=None)
+def open_cache(cache_dir):
+    """One feature cache per worker process, so its write count reaches EVICT_EVERY"""
+    return FeatureCache(cache_dir)
+
+def process_file(path, pitch_backend=DEFAULT_PITCH_BACKEND, cache_dir=None, archive=None):
+    """Extract one file (or archive entry), capturing errors instead of raising"""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            audio = open_archive(archive).buffer(path) if archive else path
+            if cache_dir:
+                features = cached_extract_features(audio, open_cache(cache_dir), pitch_backend)
+            else:
+                features = extract_features(audio, pitch_backend=pitch_backend)
+            features = features.tolist()
+            error = ""
+        except Exception as e:
+            features = [np.nan] * len(FEATURE_NAMES)
+            error = f"{type(e).__name__}: {e}"
+    messages = "; ".join(str(w.message) for w in caught
+                         if issubclass(w.category, FeatureWarning))
+    return [path] + features + [error, messages]
+
+def load_checkpoint(checkpoint_path):
+    """Return the set of paths already recorded in the checkpoint"""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    done = pd.read_csv(checkpoint_path, usecols=["path"])
+    return set(done["path"].astype(str))
+
+def write_table(checkpoint_path, output_path, model_path=None):
+    """Turn the checkpoint into the final columnar feature table"""
+    table = pd.read_csv(checkpoint_path, keep_default_na=False,
+                        na_values={name: [""] for name in FEATURE_NAMES})
+    table = table.drop_duplicates("path", keep="last").sort_values("path")
+    if model_path:
+        table = score_table(table, model_path)
+    if output_path.lower().endswith(".parquet"):
+        table.to_parquet(output_path, index=False)
+    else:
+        table.to_csv(output_path, index=False)
+    return table
+
+def score_table(table, model_path):
+    """Add prediction/probability columns with one batched model call"""
+    table["prediction"] = np.nan
+    table["probability"] = np.nan
+    ok = (table["error"] == "").to_numpy()
+    if ok.any():
+        results = predict_batch(table.loc[ok, FEATURE_NAMES].to_numpy(), model_path)
+        table.loc[ok, "prediction"] = results["prediction"]
+        table.loc[ok, "probability"] = results["probability"]
+    return table
+
+def report_progress(done, total, errors, started):
+    """Print a one-line progress report to stderr"""
+    elapsed = time.time() - started
+    rate = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / rate if rate > 0 else float("inf")
+    sys.stderr.write(f"\r[{done}/{total}] {rate:.1f} files/s, "
+                     f"{errors} errors, ETA {eta:.0f}s ")
+    sys.stderr.flush()
+
+def run(paths, output_path, workers=None, chunksize=4, resume=True, model_path=None,
+        pitch_backend=DEFAULT_PITCH_BACKEND, cache_dir=None, archive=None):
+    """Extract features for all paths (or entries of archive) into output_path"""
+    checkpoint_path = output_path + ".partial.csv"
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    done = load_checkpoint(checkpoint_path)
+    pending = [p for p in paths if p not in done]
+    total = len(paths)
+    completed = total - len(pending)
+    if done:
+        sys.stderr.write(f"Resuming: {completed} of {total} files already extracted\n")
+
+    new_file = not os.path.exists(checkpoint_path)
+    errors = 0
+    started = time.time()
+    worker = functools.partial(process_file, pitch_backend=pitch_backend, cache_dir=cache_dir,
+                               archive=archive)
+    with open(checkpoint_path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(COLUMNS)
+        # Recycle workers periodically so native (Praat/numba) memory stays bounded
+        with multiprocessing.Pool(workers, maxtasksperchild=256) as pool:
+            for row in pool.imap_unordered(worker, pending, chunksize=chunksize):
+                writer.writerow(row)
+                f.flush()
+                completed += 1
+                errors += bool(row[-2])
+                if completed % 10 == 0 or completed == total:
+                    report_progress(completed, total, errors, started)
+    sys.stderr.write("\n")
+    if cache_dir:
+        # Workers evict every EVICT_EVERY writes; trim what the last ones left
+        FeatureCache(cache_dir).evict()
+
+    table = write_table(checkpoint_path, output_path, model_path)
+    os.remove(checkpoint_path)
+    return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch Parkinson's voice feature extraction")
+    parser.add_argument("source",
+                        help="Directory of WAV files, manifest (.txt/.csv) or recording archive")
+    parser.add_argument("-o", "--output", default="features.parquet",
+                        help="Output table (.parquet or .csv)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=4,
+                        help="Files handed to a worker at a time")
+    parser.add_argument("--pitch-backend", choices=PITCH_BACKENDS, default=DEFAULT_PITCH_BACKEND,
+                        help="F0 tracker for the pitch features")
+    parser.add_argument("--cache-dir",
+                        help="Reuse/store features in this content-addressed cache")
+    parser.add_argument("--model", help="Also score every file with this model (.pkl)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    paths = find_recordings(args.source)
+    if not paths:
+        parser.error(f"No WAV files found in {args.source}")
+
+    table = run(paths, args.output, workers=args.workers,
+                chunksize=args.chunksize, resume=not args.no_resume,
+                model_path=args.model, pitch_backend=args.pitch_backend,
+                cache_dir=args.cache_dir,
+                archive=args.source if is_archive(args.source) else None)
+    failed = (table["error"] != "").sum()
+    print(f"Wrote {len(table)} rows to {args.output} ({failed} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Dynamic micro-batching in front of the Parkinson's classifier.
+
+Concurrent callers each await predict() with their own feature rows. A
+single background task takes the first waiting request, keeps collecting
+until max_batch_size rows are queued or max_wait_ms has passed since that
+request arrived, scores everything with one predict_batch call and hands
+each caller back its own slice. While a batch is being scored, new
+requests queue up and form the next batch, so batches grow with load and
+an idle service adds at most max_wait_ms to a lone request.
+"""
+import asyncio
+import collections
+import time
+import numpy as np
+from predict import predict_batch
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Upper edges of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Number of recent requests kept for the queueing-delay percentiles
+METRICS_WINDOW = 10000
+
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, executor=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self._queue = None
+        self._task = None
+        self._getter = None
+        self.batches = 0
+        self.rows = 0
+        self.size_counts = collections.Counter()
+        self.delays = collections.deque(maxlen=METRICS_WINDOW)
+
+    def start(self):
+        """Start the batching task on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._getter is not None:
+            if self._getter.done() and not self._getter.cancelled():
+                self._getter.result()[1].cancel()
+            self._getter.cancel()
+            self._getter = None
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    async def predict(self, features_matrix):
+        """Score rows as part of the next batch; returns PREDICTION_DTYPE records"""
+        X = np.asarray(features_matrix, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # Rejected here, a malformed request cannot spoil the batch it would join
+        if X.ndim != 2 or X.shape[1] != self.model.n_features_in_:
+            raise ValueError(f"Expected rows of {self.model.n_features_in_} features, "
+                             f"got shape {X.shape}")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, future, time.perf_counter()))
+        return await future
+
+    async def _next(self, timeout=None):
+        # The pending get survives a timeout and is reused by the next call,
+        # so an item that arrives just as the wait expires is never dropped
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        item = self._getter.result()
+        self._getter = None
+        return item
+
+    async def _collect(self):
+        first = await self._next()
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = first[2] + self.max_wait
+        while n_rows < self.max_batch_size:
+            item = await self._next(max(0.0, deadline - time.perf_counter()))
+            if item is None:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            try:
+                X = np.concatenate([rows for rows, _, _ in batch])
+                results = await loop.run_in_executor(
+                    self.executor, lambda: predict_batch(X, model=self.model))
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(X)
+            self.size_counts[len(X)] += 1
+            offset = 0
+            for rows, future, enqueued in batch:
+                self.delays.append(started - enqueued)
+                if not future.done():
+                    future.set_result(results[offset:offset + len(rows)])
+                offset += len(rows)
+
+    def metrics(self):
+        """Batch-size histogram and queueing delay (ms) since start"""
+        histogram = collections.OrderedDict()
+        lower = 0
+        for upper in BATCH_SIZE_BUCKETS:
+            histogram[f"le_{upper}"] = sum(count for size, count in self.size_counts.items()
+                                          if lower < size <= upper)
+            lower = upper
+        histogram["inf"] = sum(count for size, count in self.size_counts.items() if size > lower)
+        delays = np.array(self.delays) * 1000
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "batch_size_histogram": histogram,
+            "queue_delay_p50_ms": float(np.percentile(delays, 50)) if len(delays) else 0.0,
+            "queue_delay_p95_ms": float(np.percentile(delays, 95)) if len(delays) else 0.0,
+            "queue_delay_max_ms": float(delays.max()) if len(delays) else 0.0,
+        }
@@ -0,0 +1,159 @@
+"""On-disk cache of extracted voice features, keyed by audio content.
+
+Entries are addressed by SHA-256 of the audio bytes plus the extraction
+parameters (extractor version, pitch backend and range, Praat jitter and
+shimmer arguments), so renamed or copied files still hit, and any change
+to the extractor misses instead of returning stale values.
+
+Each entry is a small .npz holding the 22-feature vector, the pitch
+track and any FeatureWarning messages raised while extracting. Writes go
+to a temporary file that is renamed into place, so concurrent writers
+(batch workers, app sessions) never expose a partial entry; a writer that
+dies mid-write leaves its temporary file behind, and eviction deletes
+those once they are STALE_TMP_SECONDS old. Hits refresh the file's mtime
+and eviction removes the least recently used entries once the cache
+grows past max_bytes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import warnings
+import numpy as np
+from features import extract_features_with_pitch, extraction_params, FeatureWarning
+from pitch import DEFAULT_PITCH_BACKEND
+from pcm_buffer import PCMBuffer
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vocal-diagnose", "features")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Check the cache size after this many writes rather than after every one
+EVICT_EVERY = 64
+
+# Temporary files older than this belong to writers that died mid-write;
+# a live put() renames its file within milliseconds
+STALE_TMP_SECONDS = 3600
+
+class FeatureCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(audio_bytes, params):
+        digest = hashlib.sha256(audio_bytes)
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        # Two-character fan-out keeps directories small for large archives
+        return os.path.join(self.directory, key[:2], key + ".npz")
+
+    def get(self, key):
+        """Return (features, f0, times, messages) for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                result = (entry["features"], entry["f0"], entry["times"],
+                          entry["messages"].tolist())
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another process in the meantime
+        self.hits += 1
+        return result
+
+    def put(self, key, features, f0, times, messages=()):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, features=features, f0=f0, times=times,
+                         messages=np.array(messages, dtype=str))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Delete stale temporary files, then least recently used entries until under max_bytes"""
+        entries = []
+        total = 0
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith((".npz", ".tmp")):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith(".tmp"):
+                    if stat.st_mtime < stale_before:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+def cached_extract_features(wav_file, cache, pitch_backend=DEFAULT_PITCH_BACKEND):
+    """extract_features through a FeatureCache; returns the feature vector
+
+    wav_file is a path or a PCMBuffer (e.g. a recording archive entry,
+    keyed on its samples and rate). FeatureWarnings from the original
+    extraction are stored with the entry and re-issued on every hit, so
+    callers see the same warnings either way; any other warning is passed
+    on once, as raised.
+    """
+    if isinstance(wav_file, PCMBuffer):
+        audio = wav_file
+        key = FeatureCache.key(np.ascontiguousarray(audio.pcm),
+                               dict(extraction_params(pitch_backend), sr=audio.sr))
+    else:
+        with open(wav_file, "rb") as f:
+            audio = f.read()
+        key = FeatureCache.key(audio, extraction_params(pitch_backend))
+    cached = cache.get(key)
+    if cached is not None:
+        features, _, _, messages = cached
+    else:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", FeatureWarning)
+            # Decode the bytes already read for the key instead of reading the file again
+            features, pitch_track = extract_features_with_pitch(audio, pitch_backend)
+        messages = [str(w.message) for w in caught if issubclass(w.category, FeatureWarning)]
+        cache.put(key, features, pitch_track.f0, pitch_track.times, messages)
+        for w in caught:
+            if not issubclass(w.category, FeatureWarning):
+                warnings.warn_explicit(w.message, w.category, w.filename, w.lineno, source=w.source)
+
+    for message in messages:
+        warnings.warn(message, FeatureWarning)
+    return features
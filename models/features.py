@@ -0,0 +1,135 @@
+import warnings
+import numpy as np
+import parselmouth
+from pitch import (track_pitch, DEFAULT_PITCH_BACKEND, PITCH_FLOOR, PITCH_CEILING,
+                   PULSE_PITCH_CEILING)
+from dfa import fast_dfa
+from ingest import as_recording
+from instrumentation import stage
+# Column order of the returned vector, at the root for the results store
+from feature_names import FEATURE_NAMES
+
+# Bump whenever a change to the extraction alters feature values, so cached
+# results from older code are not reused
+EXTRACTOR_VERSION = 4
+
+# Praat arguments: time range (0, 0 = all), shortest/longest period,
+# maximum period factor (and maximum amplitude factor for shimmer)
+JITTER_ARGS = (0, 0, 0.0001, 0.02, 1.3)
+SHIMMER_ARGS = (0, 0, 0.0001, 0.02, 1.3, 1.6)
+
+class FeatureWarning(UserWarning):
+    """A voice measurement failed and was replaced by zeros"""
+
+def extraction_params(pitch_backend=DEFAULT_PITCH_BACKEND):
+    """Everything besides the audio that determines the feature values"""
+    return {
+        "version": EXTRACTOR_VERSION,
+        "pitch_backend": pitch_backend,
+        "pitch_floor": PITCH_FLOOR,
+        "pitch_ceiling": PITCH_CEILING,
+        "pulse_pitch_ceiling": PULSE_PITCH_CEILING,
+        "jitter_args": JITTER_ARGS,
+        "shimmer_args": SHIMMER_ARGS,
+    }
+
+def extract_features(wav_file, pitch_backend=DEFAULT_PITCH_BACKEND):
+    """Extract features from audio file
+
+    wav_file may be a path, encoded WAV bytes or an ingest.Recording; it is
+    decoded once and the same samples feed Praat and the NumPy measures.
+    Measurement failures fall back to zeros and are reported as warnings so
+    callers can surface them (Streamlit UI) or record them (batch mode).
+    pitch_backend picks the F0 tracker (see pitch.track_pitch).
+    """
+    return extract_features_with_pitch(wav_file, pitch_backend)[0]
+
+def extract_features_with_pitch(wav_file, pitch_backend=DEFAULT_PITCH_BACKEND):
+    """Like extract_features, but also return the PitchTrack it used"""
+    # Load audio file (decoded once, shared by Praat and NumPy)
+    with stage("features.decode"):
+        recording = as_recording(wav_file)
+        sound, y, sr = recording.sound, recording.values, recording.sr
+
+    # Pitch analysis: one tracking pass feeds the F0 statistics and the pulses
+    with stage(f"features.pitch.{pitch_backend}"):
+        pitch_track = track_pitch(sound, y, sr, backend=pitch_backend)
+    valid_pitch = pitch_track.voiced
+
+    if len(valid_pitch) > 0:
+        fo = np.mean(valid_pitch)
+        fhi = np.max(valid_pitch)
+        flo = np.min(valid_pitch)
+    else:
+        fo = fhi = flo = 0
+
+    # Jitter and shimmer are measured separately, so a failing shimmer call
+    # does not zero jitter values that were measured fine
+    jitter_percent = jitter_abs = rap = ppq = ddp = 0
+    shimmer = shimmer_db = apq3 = apq5 = apq = dda = 0
+    with stage("features.jitter_shimmer"):
+        try:
+            pulses = parselmouth.praat.call([sound, pitch_track.praat_pitch], "To PointProcess (cc)")
+        except Exception as e:
+            warnings.warn(f"Error in voice measurements: {str(e)}", FeatureWarning)
+            pulses = None
+
+        if pulses is not None:
+            try:
+                # Jitter measurements
+                jitter_percent = parselmouth.praat.call(pulses, "Get jitter (local)", *JITTER_ARGS)
+                jitter_abs = parselmouth.praat.call(pulses, "Get jitter (local, absolute)",
+                                                    *JITTER_ARGS)
+                rap = parselmouth.praat.call(pulses, "Get jitter (rap)", *JITTER_ARGS)
+                ppq = parselmouth.praat.call(pulses, "Get jitter (ppq5)", *JITTER_ARGS)
+                ddp = 3 * rap
+            except Exception as e:
+                warnings.warn(f"Error in jitter measurements: {str(e)}", FeatureWarning)
+                jitter_percent = jitter_abs = rap = ppq = ddp = 0
+
+            try:
+                # Shimmer calculations (Praat spells the dB variant "local_dB")
+                shimmer = parselmouth.praat.call([sound, pulses], "Get shimmer (local)",
+                                                 *SHIMMER_ARGS)
+                shimmer_db = parselmouth.praat.call([sound, pulses], "Get shimmer (local_dB)",
+                                                    *SHIMMER_ARGS)
+                apq3 = parselmouth.praat.call([sound, pulses], "Get shimmer (apq3)", *SHIMMER_ARGS)
+                apq5 = parselmouth.praat.call([sound, pulses], "Get shimmer (apq5)", *SHIMMER_ARGS)
+                apq = parselmouth.praat.call([sound, pulses], "Get shimmer (apq11)", *SHIMMER_ARGS)
+                dda = 3 * apq3
+            except Exception as e:
+                warnings.warn(f"Error in shimmer measurements: {str(e)}", FeatureWarning)
+                shimmer = shimmer_db = apq3 = apq5 = apq = dda = 0
+
+    # Noise measurements
+    with stage("features.hnr"):
+        try:
+            harmonicity = sound.to_harmonicity_ac()
+            hnr = parselmouth.praat.call(harmonicity, "Get mean", 0, 0)
+            nhr = 1 / (hnr + 1e-6) if hnr > 0 else 0
+        except:
+            hnr = nhr = 0
+
+    # Additional measures
+    with stage("features.dfa"):
+        try:
+            dfa_val = fast_dfa(y)
+        except Exception as e:
+            warnings.warn(f"Error in DFA: {str(e)}", FeatureWarning)
+            dfa_val = 0
+
+    if len(valid_pitch) > 1:
+        spread1 = np.std(valid_pitch)
+        spread2 = np.mean(np.diff(valid_pitch))
+        d2 = np.var(valid_pitch)
+        ppe = np.std(np.log(valid_pitch + 1e-6))
+    else:
+        spread1 = spread2 = d2 = ppe = 0
+
+    features = [
+        fo, fhi, flo, jitter_percent, jitter_abs, rap, ppq, ddp,
+        shimmer, shimmer_db, apq3, apq5, apq, dda, nhr, hnr,
+        0,  # status
+        dfa_val, spread1, spread2, d2, ppe
+    ]
+    return np.array(features), pitch_track
@@ -0,0 +1,164 @@
+"""Flattened random-forest inference.
+
+All trees of a fitted RandomForestClassifier are exported into contiguous
+node arrays and evaluated level by level for a whole batch at once, which
+avoids sklearn's per-tree estimator overhead.
+
+Usage:
+    python models/forest_engine.py random_forest_model.pkl random_forest_flat/
+"""
+import json
+import os
+import sys
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "missing_left")
+
+# Rows traversed together; keeps the (rows, trees) index arrays cache-sized
+BLOCK_SIZE = 256
+
+class FlatForest:
+    """Node arrays of every tree in a forest, concatenated
+
+    Leaves point to themselves (left == right == own index) with an infinite
+    threshold, so the traversal can run a fixed max_depth steps without
+    branching on leaf status. value holds each node's class probabilities.
+    missing_left says where a NaN feature value goes at each split, as
+    sklearn's missing_go_to_left does.
+    Index arrays are int32 to halve the memory traffic of the gathers.
+    Exposes classes_, n_features_in_, predict and predict_proba so it can be
+    passed to predict_batch in place of the sklearn model.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth,
+                 missing_left=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        # Saves from before missing_left existed sent NaN right everywhere
+        self.missing_left = (np.zeros(len(feature), dtype=bool) if missing_left is None
+                             else missing_left)
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = None
+        # Interleaved (right, left) children: next = children[2 * node + go_left]
+        self._children = np.stack([right, left], axis=1).ravel().astype(np.int32)
+        self._class_values = np.ascontiguousarray(np.asarray(value).T)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        missing_lefts = []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            idx = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, idx, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, idx, tree.children_right) + offset)
+            # sklearn < 1.3 has no missing-value routing (and rejects NaN)
+            missing_lefts.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n)),
+                                            dtype=bool) & ~is_leaf)
+
+            # Older sklearn stores class counts, newer stores fractions;
+            # normalizing covers both, as DecisionTreeClassifier.predict_proba does
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        forest = cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            missing_left=np.concatenate(missing_lefts),
+            classes=model.classes_,
+            max_depth=max_depth,
+        )
+        forest.n_features_in_ = model.n_features_in_
+        return forest
+
+    def save(self, directory):
+        """Write one .npy per array plus metadata, so load() can memory-map them"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({
+                "classes": self.classes_.tolist(),
+                "max_depth": self.max_depth,
+                "n_features_in": self.n_features_in_,
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """Load a saved forest; mmap_mode='r' shares the pages between processes"""
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ARRAYS
+                  if os.path.exists(os.path.join(directory, f"{name}.npy"))}
+        forest = cls(classes=meta["classes"], max_depth=meta["max_depth"], **arrays)
+        forest.n_features_in_ = meta["n_features_in"]
+        return forest
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_samples, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        leaves = np.empty((len(X), len(self.roots)), dtype=np.int32)
+        for start in range(0, len(X), BLOCK_SIZE):
+            leaves[start:start + BLOCK_SIZE] = self._apply_block(X[start:start + BLOCK_SIZE])
+        return leaves
+
+    def _apply_block(self, X):
+        n_samples, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_samples, dtype=np.int32) * n_features)[:, None]
+        nodes = np.repeat(self.roots[None, :], n_samples, axis=0)
+        has_missing = bool(np.isnan(flat_X).any())
+        for _ in range(self.max_depth):
+            values = flat_X[row_offsets + self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(values) & self.missing_left[nodes]
+            nodes = self._children[2 * nodes + go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.stack([values[leaves].sum(axis=1) for values in self._class_values], axis=1)
+        return proba / len(self.roots)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def main(argv=None):
+    from model_registry import load_model
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit("usage: python models/forest_engine.py MODEL.pkl OUTPUT_DIR")
+    forest = FlatForest.from_sklearn(load_model(argv[0]))
+    forest.save(argv[1])
+    print(f"Wrote {len(forest.roots)} trees / {len(forest.feature)} nodes to {argv[1]}")
+
+if __name__ == "__main__":
+    main()
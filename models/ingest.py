@@ -0,0 +1,53 @@
+"""Decode-once audio ingestion for the Parkinson's feature extractor.
+
+A Recording holds one mono float64 array at the file's native rate. The
+Praat measurements get it as a parselmouth.Sound built from that array
+and the NumPy measurements (DFA, librosa pitch trackers) use the array
+itself, so a recording is read and decoded exactly once, and uploads or
+microphone captures never need a temporary file. Audio arrives through a
+pcm_buffer.PCMBuffer, whose int16-to-float scaling gives the same sample
+values as Praat's and librosa's readers for PCM WAV.
+"""
+import functools
+import os
+import numpy as np
+import parselmouth
+# At the repository root; the models/ entry points put it on sys.path
+from pcm_buffer import PCMBuffer
+
+class Recording:
+    def __init__(self, values, sr):
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.sr = sr
+
+    @functools.cached_property
+    def sound(self):
+        """The same samples as a Praat Sound"""
+        return parselmouth.Sound(self.values, sampling_frequency=self.sr)
+
+    @property
+    def duration(self):
+        return len(self.values) / self.sr
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Native-rate float64 samples of a PCMBuffer (its one conversion for Praat)"""
+        return cls(buffer.samples(dtype=np.float64), buffer.sr)
+
+def decode_audio(source):
+    """Decode a path, file object or encoded bytes into a Recording"""
+    if isinstance(source, (str, os.PathLike)):
+        buffer = PCMBuffer.from_file(source)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = PCMBuffer.from_wav_bytes(source)
+    else:
+        buffer = PCMBuffer.from_wav_bytes(source.read())
+    return Recording.from_buffer(buffer)
+
+def as_recording(audio):
+    """Accept a Recording, a PCMBuffer, a path or encoded bytes"""
+    if isinstance(audio, Recording):
+        return audio
+    if isinstance(audio, PCMBuffer):
+        return Recording.from_buffer(audio)
+    return decode_audio(audio)
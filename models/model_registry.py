@@ -0,0 +1,79 @@
+import hashlib
+import os
+import threading
+import joblib
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """Load each model file once per process and reuse it across callers
+
+    Entries are keyed by absolute path and mmap mode. A cheap (mtime, size)
+    stamp is checked on every lookup; when it changes the file is hashed and
+    only reloaded if its contents actually changed, so touching or re-copying
+    an identical model does not pay for deserialization again.
+
+    mmap_mode is passed through to joblib.load. Arrays that the model keeps
+    as-is are then backed by the page cache and shared between worker
+    processes; sklearn trees copy their node arrays on unpickling, so for a
+    RandomForest the saving is limited to its auxiliary arrays.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, model_path, mmap_mode=None):
+        """Return the model stored at model_path, loading it if needed"""
+        path = os.path.abspath(model_path)
+        key = (path, mmap_mode)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry["stamp"] == stamp:
+            return entry["model"]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["stamp"] == stamp:
+                return entry["model"]
+
+            digest = file_digest(path)
+            if entry is not None and entry["digest"] == digest:
+                entry["stamp"] = stamp
+                return entry["model"]
+
+            model = joblib.load(path, mmap_mode=mmap_mode)
+            self.loads += 1
+            self._entries[key] = {"model": model, "stamp": stamp, "digest": digest}
+            return model
+
+    def info(self):
+        """Describe the loaded models (path, mmap mode, content hash)"""
+        return [
+            {"path": path, "mmap_mode": mmap_mode, "sha256": entry["digest"]}
+            for (path, mmap_mode), entry in self._entries.items()
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Process-wide registry: module state survives Streamlit reruns and is
+# shared by every session served by the same process
+_registry = ModelRegistry()
+
+def get_registry():
+    return _registry
+
+def load_model(model_path, mmap_mode=None):
+    """Load a model through the process-wide registry"""
+    return _registry.get(model_path, mmap_mode=mmap_mode)
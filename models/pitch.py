@@ -0,0 +1,67 @@
+import numpy as np
+import librosa
+
+PITCH_BACKENDS = ("praat", "yin", "pyin")
+# pyin is what the model was trained with. praat skips a whole tracking
+# pass, but its features have only been compared with pyin's on synthetic
+# vowels, so it stays opt-in (--pitch-backend praat) until checked on real
+# recordings
+DEFAULT_PITCH_BACKEND = "pyin"
+PITCH_FLOOR = 75
+# F0 statistics range (what the pyin features were built with)
+PITCH_CEILING = 500
+# Ceiling of the Praat track behind the jitter/shimmer pulses: Praat's
+# default, which "To PointProcess (cc)" was always run with
+PULSE_PITCH_CEILING = 600
+
+# Frames quieter than this fraction of the loudest frame count as unvoiced
+# for the YIN backend, which has no voicing decision of its own
+YIN_SILENCE_RATIO = 0.1
+
+class PitchTrack:
+    """F0 contour of a recording plus the Praat Pitch object behind the pulses
+
+    f0 is in Hz with NaN for unvoiced frames, whichever backend produced it.
+    praat_pitch is always Praat's autocorrelation track: "To PointProcess (cc)"
+    needs a Praat Pitch object for the jitter/shimmer pulses, so it is
+    computed once here and reused instead of being tracked a second time.
+    It spans PITCH_FLOOR to PULSE_PITCH_CEILING; f0 is limited to fmax.
+    """
+
+    def __init__(self, f0, times, backend, praat_pitch):
+        self.f0 = f0
+        self.times = times
+        self.backend = backend
+        self.praat_pitch = praat_pitch
+
+    @property
+    def voiced(self):
+        return self.f0[~np.isnan(self.f0)]
+
+def track_pitch(sound, y, sr, backend=DEFAULT_PITCH_BACKEND,
+                fmin=PITCH_FLOOR, fmax=PITCH_CEILING):
+    """Run the pitch stage once for both the F0 statistics and Praat's pulses
+
+    backend selects where f0 comes from: "praat" reuses the Praat track
+    (no extra pass), "yin" is librosa's fast YIN with an energy voicing gate,
+    and "pyin" is the probabilistic YIN the features were originally built on.
+    """
+    if backend not in PITCH_BACKENDS:
+        raise ValueError(f"Unknown pitch backend {backend!r}, expected one of {PITCH_BACKENDS}")
+
+    praat_pitch = sound.to_pitch(pitch_floor=fmin, pitch_ceiling=PULSE_PITCH_CEILING)
+
+    if backend == "praat":
+        f0 = praat_pitch.selected_array["frequency"].astype(np.float64)
+        f0[(f0 == 0) | (f0 > fmax)] = np.nan
+        times = praat_pitch.xs()
+    elif backend == "yin":
+        f0 = librosa.yin(y, fmin=fmin, fmax=fmax, sr=sr)
+        rms = librosa.feature.rms(y=y)[0][:len(f0)]
+        f0[rms < YIN_SILENCE_RATIO * rms.max()] = np.nan
+        times = librosa.times_like(f0, sr=sr)
+    else:
+        f0 = librosa.pyin(y, fmin=fmin, fmax=fmax, sr=sr)[0]
+        times = librosa.times_like(f0, sr=sr)
+
+    return PitchTrack(f0, times, backend, praat_pitch)
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+from model_registry import load_model
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "random_forest_model.pkl")
+
+# One record per input row: predicted label and Parkinson's probability (%)
+PREDICTION_DTYPE = np.dtype([("prediction", np.float64), ("probability", np.float64)])
+
+def predict_batch(features_matrix, model_path=DEFAULT_MODEL_PATH, mmap_mode=None, model=None):
+    """Score an (N, 22) feature matrix with a single predict_proba pass
+
+    Labels are derived from the probabilities the same way sklearn's
+    predict does (argmax over classes_), so the forest is traversed once.
+    Returns a structured array with PREDICTION_DTYPE fields.
+    """
+    if model is None:
+        model = load_model(model_path, mmap_mode=mmap_mode)
+
+    X = np.asarray(features_matrix, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] != model.n_features_in_:
+        raise ValueError(f"Expected {model.n_features_in_} features per row, got {X.shape[1]}")
+
+    proba = model.predict_proba(X)
+    results = np.empty(len(X), dtype=PREDICTION_DTYPE)
+    results["prediction"] = model.classes_[np.argmax(proba, axis=1)]
+    results["probability"] = proba[:, 1] * 100
+    return results
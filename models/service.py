@@ -0,0 +1,284 @@
+"""Headless HTTP scoring service for the Parkinson's voice model.
+
+Usage:
+    python models/service.py --port 8000 --workers 4
+
+Endpoints:
+    POST /score        raw WAV body; returns one prediction
+    POST /score/batch  multipart/form-data, one WAV per file field;
+                       all recordings are scored in a single predict pass
+    GET  /health       liveness, in-flight and served counters, batcher metrics
+    GET  /metrics      per-stage timing histograms and service counters as
+                       Prometheus text (?format=json for JSON)
+
+Feature extraction (Praat, DFA) is CPU-bound and runs on a process pool;
+the model is loaded once at startup, and rows from concurrent requests
+are scored together by a MicroBatcher (batcher.py) in a thread, so the
+event loop stays responsive. Uploads over --max-upload-mb are refused
+with 413, and once --max-inflight recordings are being processed further
+requests get 503 with Retry-After instead of queueing without bound.
+
+Each extraction's stage timings come back from the worker with its
+features and are merged into the service's instrumentation registry.
+With --allow-profiling, POST /score?profile=1 runs that request's
+extraction under cProfile and adds the text report to the response.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import numpy as np
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+# Shared modules (pcm_buffer, style, ...) live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from features import extract_features, FEATURE_NAMES, FeatureWarning
+from model_registry import load_model
+from pitch import PITCH_BACKENDS, DEFAULT_PITCH_BACKEND
+from predict import DEFAULT_MODEL_PATH
+from batcher import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from instrumentation import (REGISTRY, format_gauges, profile_call, record_stages,
+                             tracking_allocations)
+
+DEFAULT_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+DEFAULT_MAX_BATCH_FILES = 32
+
+def extract_wav_bytes(audio_bytes, pitch_backend=DEFAULT_PITCH_BACKEND, allocations=False,
+                      profile=False):
+    """Worker-side extraction
+
+    Returns (features or None, error, warnings, stage samples, profile
+    report or None); features with a non-finite value count as an error.
+    The upload is decoded in memory, so concurrent requests never share or
+    write a temporary file.
+    """
+    report = None
+    with warnings.catch_warnings(record=True) as caught, record_stages(allocations) as stages:
+        warnings.simplefilter("always")
+        try:
+            if profile:
+                features, capture = profile_call(extract_features, audio_bytes,
+                                                 pitch_backend=pitch_backend)
+                report = capture["report"]
+            else:
+                features = extract_features(audio_bytes, pitch_backend=pitch_backend)
+            features, error = features.tolist(), ""
+            # A silent or very short recording leaves HNR or DFA undefined;
+            # the model cannot score NaN and JSON cannot carry it
+            unmeasured = [name for name, value in zip(FEATURE_NAMES, features)
+                          if not np.isfinite(value)]
+            if unmeasured:
+                features, error = None, f"Could not measure {', '.join(unmeasured)}"
+        except Exception as e:
+            features, error = None, f"{type(e).__name__}: {e}"
+    messages = [str(w.message) for w in caught if issubclass(w.category, FeatureWarning)]
+    return features, error, messages, stages, report
+
+def is_wav(audio_bytes):
+    return len(audio_bytes) >= 12 and audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE"
+
+class ScoringService:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, workers=os.cpu_count() or 1,
+                 max_inflight=None, max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES,
+                 max_batch_files=DEFAULT_MAX_BATCH_FILES, pitch_backend=DEFAULT_PITCH_BACKEND,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 allow_profiling=False):
+        self.model_path = model_path
+        self.workers = workers
+        self.max_inflight = max_inflight or 4 * workers
+        self.max_upload_bytes = max_upload_bytes
+        self.max_batch_files = max_batch_files
+        self.pitch_backend = pitch_backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.allow_profiling = allow_profiling
+        self.model = None
+        self.batcher = None
+        self.executor = None
+        self.inflight = 0
+        self.served = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        self.model = load_model(self.model_path)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.batcher = MicroBatcher(self.model, self.max_batch_size, self.max_wait_ms)
+        self.batcher.start()
+        try:
+            yield
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self, n):
+        # Check and reserve in one step; the event loop is single-threaded
+        if self.inflight + n > self.max_inflight:
+            self.rejected += 1
+            raise HTTPException(503, "Scoring service is at capacity, retry shortly",
+                                headers={"Retry-After": "1"})
+        self.inflight += n
+
+    def _check_length(self, request, limit):
+        length = request.headers.get("content-length")
+        if length is None:
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            raise HTTPException(400, "Malformed Content-Length header")
+        if length > limit:
+            raise HTTPException(413, f"Request body exceeds {limit} bytes")
+
+    async def _read_body(self, request):
+        self._check_length(request, self.max_upload_bytes)
+        chunks, size = [], 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > self.max_upload_bytes:
+                raise HTTPException(413, f"Request body exceeds {self.max_upload_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def _score(self, uploads, profile=False):
+        """Extract every upload in the pool, then score them together"""
+        loop = asyncio.get_running_loop()
+        self._admit(len(uploads))
+        allocations = tracking_allocations()
+        try:
+            start = time.perf_counter()
+            extracted = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, extract_wav_bytes, audio_bytes,
+                                     self.pitch_backend, allocations, profile)
+                for audio_bytes in uploads))
+            REGISTRY.observe("service.extract", time.perf_counter() - start)
+            rows = [features for features, *_ in extracted if features is not None]
+            start = time.perf_counter()
+            predictions = iter(await self.batcher.predict(np.array(rows)) if rows else [])
+            REGISTRY.observe("service.predict", time.perf_counter() - start)
+        finally:
+            self.inflight -= len(uploads)
+
+        results = []
+        for features, error, messages, stages, report in extracted:
+            REGISTRY.merge(stages)
+            if features is None:
+                results.append({"error": error, "warnings": messages})
+                continue
+            prediction = next(predictions)
+            results.append({
+                "prediction": int(prediction["prediction"]),
+                "probability": float(prediction["probability"]),
+                "features": dict(zip(FEATURE_NAMES, features)),
+                "warnings": messages,
+            })
+            if report is not None:
+                results[-1]["profile"] = report
+        self.served += len(uploads)
+        return results
+
+    async def score(self, request):
+        audio_bytes = await self._read_body(request)
+        if not is_wav(audio_bytes):
+            raise HTTPException(415, "Expected a WAV file body")
+        profile = request.query_params.get("profile") == "1"
+        if profile and not self.allow_profiling:
+            raise HTTPException(403, "Profiling is disabled; start the service with --allow-profiling")
+        result = (await self._score([audio_bytes], profile))[0]
+        return JSONResponse(result, status_code=422 if "error" in result else 200)
+
+    async def score_batch(self, request):
+        self._check_length(request, self.max_upload_bytes * self.max_batch_files)
+        async with request.form(max_files=self.max_batch_files,
+                                max_part_size=self.max_upload_bytes) as form:
+            uploads = [(name, value) for name, value in form.multi_items()
+                       if hasattr(value, "read")]
+            if not uploads:
+                raise HTTPException(400, "No files in the multipart body")
+            names = [upload.filename or name for name, upload in uploads]
+            files = [await upload.read() for _, upload in uploads]
+        if any(len(audio_bytes) > self.max_upload_bytes for audio_bytes in files):
+            raise HTTPException(413, f"A file exceeds {self.max_upload_bytes} bytes")
+
+        valid = [i for i, audio_bytes in enumerate(files) if is_wav(audio_bytes)]
+        scored = iter(await self._score([files[i] for i in valid]) if valid else [])
+        results = []
+        for i, name in enumerate(names):
+            result = next(scored) if i in valid else {"error": "Not a WAV file", "warnings": []}
+            results.append({"filename": name, **result})
+        return JSONResponse({"results": results})
+
+    async def health(self, request):
+        return JSONResponse({
+            "status": "ok" if self.model is not None else "starting",
+            "workers": self.workers,
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "served": self.served,
+            "rejected": self.rejected,
+            "batcher": self.batcher.metrics() if self.batcher is not None else None,
+        })
+
+    async def metrics(self, request):
+        counters = {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "served": self.served,
+            "rejected": self.rejected,
+        }
+        batcher = self.batcher.metrics() if self.batcher is not None else {}
+        if request.query_params.get("format") == "json":
+            return JSONResponse({"stages": REGISTRY.snapshot(), "service": counters,
+                                 "batcher": batcher})
+        return PlainTextResponse(REGISTRY.to_prometheus()
+                                 + format_gauges(counters, "voice_service")
+                                 + format_gauges(batcher, "voice_batcher"))
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/score", self.score, methods=["POST"]),
+            Route("/score/batch", self.score_batch, methods=["POST"]),
+            Route("/health", self.health, methods=["GET"]),
+            Route("/metrics", self.metrics, methods=["GET"]),
+        ], lifespan=self.lifespan)
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="feature extraction processes")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="recordings processed at once before 503 (default 4 per worker)")
+    parser.add_argument("--max-upload-mb", type=float, default=DEFAULT_MAX_UPLOAD_BYTES / 2 ** 20)
+    parser.add_argument("--max-batch-files", type=int, default=DEFAULT_MAX_BATCH_FILES)
+    parser.add_argument("--pitch-backend", choices=PITCH_BACKENDS, default=DEFAULT_PITCH_BACKEND)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="feature rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="longest a row waits for its batch to fill")
+    parser.add_argument("--allow-profiling", action="store_true",
+                        help="let POST /score?profile=1 return a cProfile report")
+    args = parser.parse_args()
+
+    service = ScoringService(args.model, args.workers, args.max_inflight,
+                             int(args.max_upload_mb * 2 ** 20), args.max_batch_files,
+                             args.pitch_backend, args.max_batch_size, args.max_wait_ms,
+                             args.allow_profiling)
+    uvicorn.run(service.app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
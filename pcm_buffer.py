@@ -0,0 +1,119 @@
+"""One canonical PCM buffer per recording, shared by every consumer.
+
+A 16-bit PCM WAV is wrapped as an int16 NumPy view straight over the
+uploaded bytes (no decode, no copy); microphone captures can be recorded
+as int16 and wrapped as they are. Consumers ask for samples(rate, dtype):
+the float conversion is done once per (rate, dtype) and memoized, and
+resampling happens only when a consumer needs a rate other than the
+recording's own. Float arithmetic cannot view int16 memory in place, so
+each distinct request costs exactly one conversion and nothing more.
+
+Other WAV encodings (24-bit, float) are decoded once with soundfile into
+a float32 canonical buffer, so their precision is kept.
+"""
+import io
+import struct
+import numpy as np
+import soundfile as sf
+import soxr
+
+# WAVE_FORMAT_PCM and WAVE_FORMAT_EXTENSIBLE
+_PCM_FORMATS = (1, 0xFFFE)
+
+def _find_pcm16(data):
+    """Return (offset, size, channels, sr) of a 16-bit PCM data chunk, or None"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = bytes(data[pos:pos + 4])
+        size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt " and size >= 16:
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sr, _, _, bits = fmt
+            if audio_format not in _PCM_FORMATS or bits != 16 or channels < 1:
+                return None
+            # Streaming writers may leave the size unset; clamp to what is there
+            size = min(size, len(data) - body)
+            return body, size - size % (2 * channels), channels, sr
+        pos = body + size + (size & 1)
+    return None
+
+class PCMBuffer:
+    def __init__(self, pcm, sr, wav_bytes=None):
+        """pcm is (frames, channels) int16 or float32; wav_bytes its encoded form, if known"""
+        pcm = np.asarray(pcm)
+        self.pcm = pcm.reshape(-1, 1) if pcm.ndim == 1 else pcm
+        self.sr = sr
+        self._wav_bytes = wav_bytes
+        self._samples = {}
+
+    @classmethod
+    def from_wav_bytes(cls, wav_bytes):
+        """Wrap WAV bytes; 16-bit PCM is viewed in place, anything else decoded once"""
+        found = _find_pcm16(memoryview(wav_bytes).cast("B"))
+        if found is not None:
+            offset, size, channels, sr = found
+            pcm = np.frombuffer(wav_bytes, dtype="<i2", count=size // 2, offset=offset)
+            return cls(pcm.reshape(-1, channels), sr, wav_bytes)
+        pcm, sr = sf.read(io.BytesIO(wav_bytes), dtype="float32", always_2d=True)
+        return cls(pcm, sr, wav_bytes)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_wav_bytes(f.read())
+
+    @property
+    def channels(self):
+        return self.pcm.shape[1]
+
+    @property
+    def frames(self):
+        return self.pcm.shape[0]
+
+    @property
+    def duration(self):
+        return self.frames / self.sr
+
+    @property
+    def scale(self):
+        """Factor mapping the stored values to [-1, 1)"""
+        return 1 / 32768 if self.pcm.dtype == np.int16 else 1.0
+
+    def to_float(self, start=0, stop=None, dtype=np.float32):
+        """Mono float samples of frames [start, stop) at the native rate (one allocation)"""
+        block = self.pcm[start:stop]
+        if self.channels == 1:
+            block = block[:, 0]
+            if block.dtype == dtype:
+                return block  # already float at the right precision: a view
+            return np.multiply(block, self.scale, dtype=dtype)
+        y = np.mean(block, axis=1, dtype=dtype)
+        y *= self.scale
+        return y
+
+    def samples(self, sr=None, dtype=np.float32):
+        """Mono float samples at sr (default: native), converted once and memoized"""
+        sr = sr or self.sr
+        key = (sr, np.dtype(dtype).str)
+        if key not in self._samples:
+            y = self.to_float(dtype=dtype)
+            if sr != self.sr:
+                y = soxr.resample(y, self.sr, sr).astype(dtype, copy=False)
+            self._samples[key] = y
+        return self._samples[key]
+
+    def to_wav_bytes(self):
+        """Encoded WAV; the original bytes when the buffer came from them"""
+        if self._wav_bytes is None:
+            buffer = io.BytesIO()
+            subtype = "PCM_16" if self.pcm.dtype == np.int16 else "FLOAT"
+            sf.write(buffer, self.pcm, self.sr, format="WAV", subtype=subtype)
+            self._wav_bytes = buffer.getvalue()
+        return self._wav_bytes
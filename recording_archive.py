@@ -0,0 +1,203 @@
+"""Packed, memory-mapped archive of recordings for bulk re-analysis.
+
+Usage:
+    python recording_archive.py pack recordings/ study.vda [--manifest meta.csv]
+    python recording_archive.py verify study.vda
+
+An archive is a directory holding:
+    samples.i16    every recording's 16-bit PCM, interleaved, back to back
+    index.parquet  one row per recording: name, offset (in int16
+                   samples), frames, channels, sr, test_type, user_id, sha256
+    meta.json      format version
+
+Opening an archive memory-maps samples.i16 once; each recording is then a
+zero-copy int16 slice wrapped as a pcm_buffer.PCMBuffer, so reading one of
+hundreds of thousands of recordings costs no file open or header parse.
+analyze_audio, DecodedAudio and the Parkinson's extractor all accept a
+PCMBuffer directly.
+
+The optional --manifest CSV has a path column plus test_type and/or
+user_id; paths are relative to the source directory. WAVs that are not
+16-bit PCM are converted to it when packed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from pcm_buffer import PCMBuffer
+
+ARCHIVE_VERSION = 1
+SAMPLES_FILE = "samples.i16"
+INDEX_FILE = "index.parquet"
+META_FILE = "meta.json"
+INDEX_COLUMNS = ["name", "offset", "frames", "channels", "sr", "test_type", "user_id", "sha256"]
+
+class ArchiveError(ValueError):
+    """An archive is missing, malformed or fails verification"""
+
+def is_archive(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+def read_pcm16(path):
+    """(frames, channels) int16 samples and rate of an audio file"""
+    buffer = PCMBuffer.from_file(path)
+    if buffer.pcm.dtype == np.int16:
+        return buffer.pcm, buffer.sr
+    pcm, sr = sf.read(path, dtype="int16", always_2d=True)
+    return pcm, sr
+
+class RecordingArchive:
+    def __init__(self, path):
+        if not is_archive(path):
+            raise ArchiveError(f"{path} is not a recording archive")
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("version") != ARCHIVE_VERSION:
+            raise ArchiveError(f"Unsupported archive version {meta.get('version')}")
+        self.path = path
+        self.index = pd.read_parquet(os.path.join(path, INDEX_FILE))
+        samples_path = os.path.join(path, SAMPLES_FILE)
+        # np.memmap refuses empty files; an empty archive has no slices to map
+        self.samples = (np.memmap(samples_path, dtype="<i2", mode="r")
+                        if os.path.getsize(samples_path) else np.zeros(0, dtype="<i2"))
+        self._positions = {name: i for i, name in enumerate(self.index["name"])}
+        # Plain arrays for the per-recording lookups; DataFrame row access is slow
+        self._offsets = self.index["offset"].to_numpy(dtype=np.int64)
+        self._frames = self.index["frames"].to_numpy(dtype=np.int64)
+        self._channels = self.index["channels"].to_numpy(dtype=np.int64)
+        self._rates = self.index["sr"].to_numpy(dtype=np.int64)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def names(self):
+        return self.index["name"].tolist()
+
+    def _position(self, key):
+        return self._positions[key] if isinstance(key, str) else key
+
+    def pcm(self, key):
+        """(frames, channels) int16 view of a recording, by name or position"""
+        i = self._position(key)
+        channels = int(self._channels[i])
+        start = int(self._offsets[i])
+        stop = start + int(self._frames[i]) * channels
+        return self.samples[start:stop].reshape(-1, channels)
+
+    def buffer(self, key):
+        """The recording as a PCMBuffer over the mapped samples"""
+        return PCMBuffer(self.pcm(key), int(self._rates[self._position(key)]))
+
+    def select(self, test_type=None, user_id=None):
+        """Names of the recordings matching the given metadata"""
+        mask = np.ones(len(self.index), dtype=bool)
+        if test_type is not None:
+            mask &= self.index["test_type"] == test_type
+        if user_id is not None:
+            mask &= self.index["user_id"] == user_id
+        return self.index.loc[mask, "name"].tolist()
+
+def pack(paths, archive_path, root=None, metadata=None, progress=None):
+    """Write the WAV files in paths into a new archive; returns the entry count"""
+    metadata = metadata or {}
+    os.makedirs(archive_path, exist_ok=True)
+    rows = []
+    offset = 0
+    with open(os.path.join(archive_path, SAMPLES_FILE), "wb") as f:
+        for i, path in enumerate(paths):
+            pcm, sr = read_pcm16(path)
+            pcm = np.ascontiguousarray(pcm, dtype="<i2")
+            f.write(pcm.tobytes())
+            name = os.path.relpath(path, root) if root else path
+            info = metadata.get(name, {})
+            rows.append([name, offset, pcm.shape[0], pcm.shape[1], sr,
+                         info.get("test_type", ""), info.get("user_id", ""),
+                         hashlib.sha256(pcm).hexdigest()])
+            offset += pcm.size
+            if progress is not None:
+                progress(i + 1, len(paths))
+
+    index = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+    index["test_type"] = index["test_type"].astype(str)
+    index["user_id"] = index["user_id"].astype(str)
+    index.to_parquet(os.path.join(archive_path, INDEX_FILE), index=False)
+    # Written last: an interrupted pack leaves no meta.json and fails to open
+    with open(os.path.join(archive_path, META_FILE), "w") as f:
+        json.dump({"version": ARCHIVE_VERSION, "dtype": "<i2"}, f)
+    return len(rows)
+
+def verify(archive_path):
+    """Check layout and checksums; returns a list of problems (empty if sound)"""
+    archive = RecordingArchive(archive_path)
+    problems = []
+    if archive.index["name"].duplicated().any():
+        problems.append("duplicate names in index")
+    expected_offset = 0
+    for row in archive.index.itertuples(index=False):
+        if row.offset != expected_offset:
+            problems.append(f"{row.name}: offset {row.offset}, expected {expected_offset}")
+        end = row.offset + row.frames * row.channels
+        expected_offset = end
+        if end > len(archive.samples):
+            problems.append(f"{row.name}: extends past the end of {SAMPLES_FILE}")
+            continue
+        if hashlib.sha256(archive.pcm(row.name)).hexdigest() != row.sha256:
+            problems.append(f"{row.name}: checksum mismatch")
+    used = sum(int(r.frames) * int(r.channels) for r in archive.index.itertuples(index=False))
+    if used != len(archive.samples):
+        problems.append(f"{SAMPLES_FILE} holds {len(archive.samples)} samples, index covers {used}")
+    return problems
+
+def find_wavs(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".wav"):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def load_manifest(manifest_path):
+    """Map relative path -> {test_type, user_id} from a manifest CSV"""
+    table = pd.read_csv(manifest_path, dtype=str, keep_default_na=False)
+    columns = [c for c in ("test_type", "user_id") if c in table.columns]
+    return {row["path"]: {c: row[c] for c in columns} for _, row in table.iterrows()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_parser = commands.add_parser("pack", help="pack a directory of WAVs")
+    pack_parser.add_argument("source", help="directory of WAV files")
+    pack_parser.add_argument("archive", help="archive directory to create")
+    pack_parser.add_argument("--manifest", help="CSV with path, test_type, user_id columns")
+    verify_parser = commands.add_parser("verify", help="check an archive's layout and checksums")
+    verify_parser.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        if is_archive(args.archive):
+            sys.exit(f"{args.archive} already exists; remove it first")
+        paths = find_wavs(args.source)
+        metadata = load_manifest(args.manifest) if args.manifest else None
+
+        def report(done, total):
+            if done % 1000 == 0 or done == total:
+                print(f"\r{done}/{total} packed", end="", file=sys.stderr, flush=True)
+
+        count = pack(paths, args.archive, root=args.source, metadata=metadata, progress=report)
+        print(file=sys.stderr)
+        print(f"Packed {count} recordings into {args.archive}")
+    else:
+        problems = verify(args.archive)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(f"{len(problems)} problems found in {args.archive}")
+        print(f"{args.archive}: {len(RecordingArchive(args.archive))} recordings OK")
+
+if __name__ == "__main__":
+    main()
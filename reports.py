@@ -0,0 +1,236 @@
+"""PDF assessment reports: one at a time for the app, or in bulk for clinics.
+
+Usage:
+    python reports.py export records.jsonl reports.zip [-j 4]
+    python reports.py export records.jsonl all_reports.pdf --combined
+
+records.jsonl has one report per line ("name" becomes the zip entry
+name, prefixed with the record's position):
+    {"name": "...", "patient": {name, age, gender}, "analysis": {voice_stability,
+     breathing_rate, overall_score, recommendations}}
+
+The reportlab stylesheet and table styles are built once per process
+(report_styles) instead of on every report. export_zip renders reports
+in worker processes, with at most a few per worker in flight, and writes
+each PDF into the zip as soon as it is next in order. Records can come
+from a generator, so neither the input nor the finished PDFs are ever
+all in memory. The zip may be an unseekable stream (e.g. an HTTP
+response).
+
+export_combined writes every report into one PDF, each starting on a new
+page. reportlab keeps a document's pages until it is saved, so this path
+is single-process and holds every page until the end; prefer the zip
+for large exports.
+"""
+import argparse
+import functools
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+DEFAULT_RECOMMENDATIONS = [
+    "Schedule follow-up assessment",
+    "Practice breathing exercises",
+    "Monitor voice strain levels"
+]
+
+RISK_ROWS = [
+    ["Condition", "Risk Level", "Recommendation"],
+    ["Respiratory Issues", "Low", "Regular monitoring"],
+    ["Voice Disorders", "Medium", "Voice therapy recommended"],
+    ["Sleep Apnea", "Low", "Follow sleep hygiene practices"],
+]
+
+DISCLAIMER = (
+    "This report is generated based on AI-powered voice analysis and should be reviewed "
+    "by a healthcare professional. The recommendations provided are general in nature "
+    "and should not replace professional medical advice."
+)
+
+# Reports queued per worker process during a bulk export
+IN_FLIGHT_PER_WORKER = 4
+
+@functools.lru_cache(maxsize=None)
+def report_styles():
+    """(paragraph stylesheet, grid table style, header table style), built once per process"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    ))
+    grid = TableStyle([
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('PADDING', (0, 0), (-1, -1), 6),
+    ])
+    header = TableStyle([
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('PADDING', (0, 0), (-1, -1), 6),
+    ])
+    return styles, grid, header
+
+def report_story(patient_data, analysis_results):
+    """The flowables of one report"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+    styles, grid, header = report_styles()
+    story = []
+
+    # Title
+    story.append(Paragraph("Medical Assessment Report", styles['CustomTitle']))
+    story.append(Spacer(1, 12))
+
+    # Patient Information
+    story.append(Paragraph("Patient Information", styles['Heading2']))
+    patient_info = [
+        ["Name:", patient_data.get('name', 'Saif')],
+        ["Age:", str(patient_data.get('age', '20')) + " years"],
+        ["Gender:", patient_data.get('gender', 'Male')],
+        ["Assessment Date:", datetime.now().strftime("%Y-%m-%d")],
+    ]
+    story.append(Table(patient_info, colWidths=[2*inch, 4*inch], style=grid))
+    story.append(Spacer(1, 20))
+
+    # Health Scores
+    story.append(Paragraph("Health Assessment Scores", styles['Heading2']))
+    health_scores = [
+        ["Metric", "Score"],
+        ["Voice Stability", f"{analysis_results.get('voice_stability', 0):.1f}%"],
+        ["Breathing Rate", f"{analysis_results.get('breathing_rate', 0):.1f} bpm"],
+        ["Overall Health", f"{analysis_results.get('overall_score', 0):.1f}%"]
+    ]
+    story.append(Table(health_scores, colWidths=[3*inch, 3*inch], style=header))
+    story.append(Spacer(1, 20))
+
+    # Risk Assessment
+    story.append(Paragraph("Risk Assessment", styles['Heading2']))
+    story.append(Table(RISK_ROWS, colWidths=[2*inch, 1.5*inch, 3*inch], style=header))
+    story.append(Spacer(1, 20))
+
+    # Recommendations
+    story.append(Paragraph("Recommendations", styles['Heading2']))
+    for rec in analysis_results.get('recommendations', DEFAULT_RECOMMENDATIONS):
+        story.append(Paragraph(f"• {rec}", styles['Normal']))
+        story.append(Spacer(1, 6))
+
+    # Disclaimer
+    story.append(Spacer(1, 30))
+    story.append(Paragraph("Disclaimer:", styles['Heading4']))
+    story.append(Paragraph(DISCLAIMER, styles['Normal']))
+    return story
+
+def render_report(patient_data, analysis_results):
+    """PDF bytes of one report"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(report_story(patient_data, analysis_results))
+    return buffer.getvalue()
+
+def _render_record(record):
+    return render_report(record["patient"], record["analysis"])
+
+def report_filename(record, index):
+    """Zip entry name of a record: its index, then its name reduced to safe characters
+
+    The index prefix keeps records with the same name apart; path
+    separators and ".." never reach the entry name.
+    """
+    name = str(record.get("name") or "report")
+    if name.lower().endswith(".pdf"):
+        name = name[:-4]
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "report"
+    return f"{index:05d}_{name}.pdf"
+
+def export_zip(records, output, workers=None, progress=None):
+    """Render records (an iterable of dicts) into a zip at output; returns the report count
+
+    output may be a path or a writable binary file, seekable or not.
+    Reports keep the input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = IN_FLIGHT_PER_WORKER * workers
+    count = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []  # (filename, future), oldest first
+        records = iter(records)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                record = next(records, None)
+                if record is None:
+                    exhausted = True
+                    break
+                pending.append((report_filename(record, count + len(pending)),
+                                executor.submit(_render_record, record)))
+            if not pending:
+                break
+            filename, future = pending.pop(0)
+            archive.writestr(filename, future.result())
+            count += 1
+            if progress is not None:
+                progress(count)
+    return count
+
+def export_combined(records, output, progress=None):
+    """Render records into one PDF at output (path or binary file), a page break between each"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import PageBreak, SimpleDocTemplate
+    story = []
+    count = 0
+    for record in records:
+        if story:
+            story.append(PageBreak())
+        story.extend(report_story(record["patient"], record["analysis"]))
+        count += 1
+        if progress is not None:
+            progress(count)
+    SimpleDocTemplate(output, pagesize=letter).build(story)
+    return count
+
+def read_records(path):
+    """Yield report records from a JSON-lines file, one at a time"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="render many reports at once")
+    export_parser.add_argument("records", help="JSON-lines file of report records")
+    export_parser.add_argument("output", help="zip (or PDF with --combined) to write")
+    export_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    export_parser.add_argument("--combined", action="store_true",
+                               help="one multi-report PDF instead of a zip of PDFs")
+    args = parser.parse_args()
+
+    def report(done):
+        if done % 100 == 0:
+            print(f"\r{done} reports", end="", file=sys.stderr, flush=True)
+
+    start = datetime.now()
+    if args.combined:
+        count = export_combined(read_records(args.records), args.output, progress=report)
+    else:
+        count = export_zip(read_records(args.records), args.output, args.workers, progress=report)
+    seconds = (datetime.now() - start).total_seconds()
+    print(file=sys.stderr)
+    print(f"Wrote {count} reports to {args.output} in {seconds:.1f}s "
+          f"({count / seconds if seconds else 0:.1f} reports/s)")
+
+if __name__ == "__main__":
+    main()
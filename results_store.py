@@ -0,0 +1,511 @@
+"""Screening results kept in health_monitor.db, queryable per user over time.
+
+Every analyzed recording becomes one row of the screenings table: who
+(user_id, from patient_user_id), which test (test_type), when (recorded_at, Unix seconds), the
+health indicators from app.py, the Parkinson's model score, and two
+feature vectors stored as float32 blobs:
+- voice_features: app.py summaries (VOICE_FEATURE_NAMES)
+- parkinsons_features: the 22-value vector of models/features.py
+
+The table is clustered on (user_id, recorded_at, screening_id): a
+WITHOUT ROWID table stores rows in primary-key order, so one user's
+history sits on a few adjacent pages and a trend query is a single range
+scan, however many other users there are. A secondary index on
+recorded_at serves time-range queries across users. screening_id is
+assigned by the writer inside its transaction, so ids are unique across
+processes and increase in commit order; feature_warehouse.sync pages on
+them.
+
+The database runs in WAL mode, so readers never wait for the writer.
+Connections come from a small pool and are reused across queries.
+record() validates the row and queues it for a writer thread without
+touching the database; the writer commits whatever has queued up (up to
+BATCH_SIZE rows, or FLUSH_INTERVAL after the first) in one transaction.
+If a batch breaks a constraint, its rows are retried one per transaction,
+so only the offending row is lost. Lost rows are counted in metrics();
+flush() waits for the queue to drain and re-raises the last write error.
+
+The trends table holds running statistics of every TREND_METRICS value
+per user and test type: count, mean and variance (Welford), an
+exponentially weighted mean over recent screenings, min, max and the
+latest value. The writer folds each new screening into its rows in the
+same transaction that stores it, which is O(1) however long the history,
+so trend displays read a handful of precomputed rows. The EWMA assumes
+screenings arrive roughly in time order; rebuild_trends recomputes
+everything from the stored history (after a backfill, for example).
+"""
+import atexit
+import contextlib
+import hashlib
+import hmac
+import os
+import queue
+import sqlite3
+import threading
+import time
+import numpy as np
+from feature_names import FEATURE_NAMES
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.environ.get("VOICE_RESULTS_DB", os.path.join(ROOT, "health_monitor.db"))
+# Deployment secret patient IDs are keyed with; no history is kept without it
+PATIENT_ID_KEY_ENV = "VOICE_PATIENT_ID_KEY"
+
+DEFAULT_POOL_SIZE = 4
+BATCH_SIZE = 500
+# Seconds the writer waits for more rows before committing a partial batch
+FLUSH_INTERVAL = 0.2
+# Seconds a connection waits on a lock held by another process
+BUSY_TIMEOUT = 10.0
+
+VOICE_FEATURE_NAMES = [f"mfcc_{i}_mean" for i in range(1, 14)] + [
+    "spectral_centroid_mean", "zero_crossing_rate_mean"
+]
+
+# Names of the stored Parkinson's vector; the unused "status" slot is None
+PARKINSONS_FEATURE_NAMES = [None if name == "status" else name for name in FEATURE_NAMES]
+
+TREND_METRICS = ["voice_stability", "breathing_rate", "parkinsons_score"] + [
+    name for name in PARKINSONS_FEATURE_NAMES if name is not None
+]
+
+# Weight of the newest screening in the EWMA (about the last 9 screenings)
+EWMA_ALPHA = 0.2
+
+# Scalar columns a history query may select
+INDICATOR_COLUMNS = [
+    "duration", "voice_stability", "breathing_rate",
+    "parkinsons_prediction", "parkinsons_score"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenings (
+    user_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    screening_id INTEGER NOT NULL,
+    test_type TEXT NOT NULL,
+    audio_sha256 TEXT,
+    duration REAL,
+    voice_stability REAL,
+    breathing_rate REAL,
+    parkinsons_prediction INTEGER,
+    parkinsons_score REAL,
+    voice_features BLOB,
+    parkinsons_features BLOB,
+    PRIMARY KEY (user_id, recorded_at, screening_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS screenings_time ON screenings (recorded_at);
+CREATE UNIQUE INDEX IF NOT EXISTS screenings_id ON screenings (screening_id);
+CREATE TABLE IF NOT EXISTS trends (
+    user_id TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    ewma REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    last REAL NOT NULL,
+    first_at REAL NOT NULL,
+    last_at REAL NOT NULL,
+    PRIMARY KEY (user_id, test_type, metric)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = [
+    "user_id", "recorded_at", "screening_id", "test_type", "audio_sha256",
+    "duration", "voice_stability", "breathing_rate", "parkinsons_prediction",
+    "parkinsons_score", "voice_features", "parkinsons_features"
+]
+
+INSERT = (f"INSERT INTO screenings ({', '.join(COLUMNS)}) "
+          f"VALUES ({', '.join('?' * len(COLUMNS))})")
+
+TREND_COLUMNS = ["count", "mean", "m2", "ewma", "min", "max", "last", "first_at", "last_at"]
+
+UPSERT_TREND = (f"INSERT OR REPLACE INTO trends (user_id, test_type, metric, "
+                f"{', '.join(TREND_COLUMNS)}) VALUES ({', '.join('?' * (3 + len(TREND_COLUMNS)))})")
+
+_STOP = object()
+
+def patient_user_id(patient_id):
+    """user_id a patient's screenings are stored under, or None without a patient ID
+
+    app.py and models/parkinson.py both key screenings on this, so one
+    patient's voice screenings and Parkinson's results form one history.
+    Clinic record numbers are short enough to enumerate, so a plain hash
+    would give them away; the ID is an HMAC-SHA256 keyed by the secret in
+    VOICE_PATIENT_ID_KEY, which the database never sees. Without that key
+    this returns None and no history is kept.
+    """
+    patient_id = str(patient_id or "").strip().upper()
+    key = os.environ.get(PATIENT_ID_KEY_ENV, "")
+    if not patient_id or not key:
+        return None
+    return hmac.new(key.encode(), patient_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+def voice_feature_vector(analysis_results):
+    """VOICE_FEATURE_NAMES values of an app.py analysis result, as float32"""
+    features = analysis_results['features']
+    mfcc = np.asarray(features['mfcc'], dtype=np.float64)
+    mfcc_means = mfcc.mean(axis=1) if mfcc.size else np.zeros(len(mfcc))
+    centroids = np.asarray(features['spectral_centroids'], dtype=np.float64)
+    zcr = np.asarray(features['zero_crossing_rate'], dtype=np.float64)
+    return np.concatenate([
+        mfcc_means,
+        [centroids.mean() if centroids.size else 0.0, zcr.mean() if zcr.size else 0.0],
+    ]).astype(np.float32)
+
+def _blob(vector):
+    return None if vector is None else np.asarray(vector, dtype=np.float32).tobytes()
+
+def _vector(blob):
+    return None if blob is None else np.frombuffer(blob, dtype=np.float32)
+
+def _optional(value, kind):
+    return None if value is None else kind(value)
+
+def metric_values(row):
+    """{metric: value} of the TREND_METRICS present in an INSERT row"""
+    values = dict(zip(["voice_stability", "breathing_rate", "parkinsons_score"],
+                      (row[6], row[7], row[9])))
+    features = _vector(row[11])
+    if features is not None:
+        values.update((name, value) for name, value
+                      in zip(PARKINSONS_FEATURE_NAMES, features.tolist()) if name is not None)
+    return {metric: value for metric, value in values.items()
+            if value is not None and np.isfinite(value)}
+
+def fold(state, value, recorded_at):
+    """Running statistics (TREND_COLUMNS) with one more value"""
+    if state is None:
+        return [1, value, 0.0, value, value, value, value, recorded_at, recorded_at]
+    count, mean, m2, ewma, low, high, _, first_at, last_at = state
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    ewma += EWMA_ALPHA * (value - ewma)
+    return [count, mean, m2, ewma, min(low, value), max(high, value), value,
+            min(first_at, recorded_at), max(last_at, recorded_at)]
+
+def trend_summary(state):
+    """Readable statistics of a trends row"""
+    summary = dict(zip(TREND_COLUMNS, state))
+    m2 = summary.pop("m2")
+    summary["std"] = float(np.sqrt(m2 / (summary["count"] - 1))) if summary["count"] > 1 else 0.0
+    return summary
+
+def update_trends(conn, rows):
+    """Fold INSERT rows into the trends table, in row order, inside the caller's transaction"""
+    states = {}
+    for row in rows:
+        user_id, recorded_at, test_type = row[0], row[1], row[3]
+        if (user_id, test_type) not in states:
+            states[user_id, test_type] = {
+                metric: list(state) for metric, *state in conn.execute(
+                    f"SELECT metric, {', '.join(TREND_COLUMNS)} FROM trends "
+                    f"WHERE user_id = ? AND test_type = ?", (user_id, test_type))
+            }
+        metrics = states[user_id, test_type]
+        for metric, value in metric_values(row).items():
+            metrics[metric] = fold(metrics.get(metric), value, recorded_at)
+    conn.executemany(UPSERT_TREND, (
+        (user_id, test_type, metric, *state)
+        for (user_id, test_type), metrics in states.items()
+        for metric, state in metrics.items()
+    ))
+
+class ConnectionPool:
+    """Up to size SQLite connections to one database, reused across threads"""
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at every checkpoint; a crash loses at most the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while size connections are in use"""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+class ResultsStore:
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=DEFAULT_POOL_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            new_trends = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'trends'").fetchone() is None
+            conn.executescript(SCHEMA)
+            stored = conn.execute("SELECT 1 FROM screenings LIMIT 1").fetchone() is not None
+        if new_trends and stored:
+            # Screenings stored before the trends table existed
+            self.rebuild_trends()
+        self.written = 0
+        self.batches = 0
+        self.failed_rows = 0
+        self.last_error = None
+        self._error = None
+        self._pending = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="results-writer",
+                                        daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, user_id, test_type, analysis_results=None, recorded_at=None,
+               audio_sha256=None, parkinsons_features=None, parkinsons_prediction=None,
+               parkinsons_score=None):
+        """Queue one screening for writing
+
+        analysis_results is an app.py analysis (health indicators and
+        voice features); the Parkinson's values come from models/.
+        Raises ValueError for a row the database would reject.
+        """
+        recorded_at = time.time() if recorded_at is None else float(recorded_at)
+        if not np.isfinite(recorded_at):
+            raise ValueError(f"recorded_at must be a finite Unix time, got {recorded_at}")
+        if user_id is None or not str(user_id):
+            raise ValueError("user_id is required")
+        if not test_type:
+            raise ValueError("test_type is required")
+        indicators = analysis_results['health_indicators'] if analysis_results else {}
+        self._pending.put((
+            str(user_id),
+            recorded_at,
+            None,  # screening_id, assigned by the writer
+            str(test_type),
+            audio_sha256,
+            _optional(indicators.get('duration'), float),
+            _optional(indicators.get('voice_stability'), float),
+            _optional(indicators.get('breathing_rate'), float),
+            _optional(parkinsons_prediction, int),
+            _optional(parkinsons_score, float),
+            _blob(voice_feature_vector(analysis_results)) if analysis_results else None,
+            _blob(parkinsons_features),
+        ))
+
+    def _commit(self, rows):
+        with self.pool.connection() as conn:
+            # Take the write lock before reading the trends rows, so a
+            # writer in another process cannot update them in between
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Under the write lock, so ids increase in commit order
+                # across every process writing to the database
+                first_id = conn.execute(
+                    "SELECT COALESCE(MAX(screening_id), 0) + 1 FROM screenings").fetchone()[0]
+                rows = [row[:2] + (first_id + i,) + row[3:] for i, row in enumerate(rows)]
+                conn.executemany(INSERT, rows)
+                update_trends(conn, rows)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        self.written += len(rows)
+        self.batches += 1
+
+    def _failed(self, rows, error):
+        self.failed_rows += rows
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._error = error
+
+    def _write(self, batch):
+        try:
+            self._commit(batch)
+        except sqlite3.IntegrityError as e:
+            if len(batch) == 1:
+                self._failed(1, e)
+                return
+            # A constraint broken by one row: write the others one by one
+            for row in batch:
+                try:
+                    self._commit([row])
+                except Exception as e:
+                    self._failed(1, e)
+        except Exception as e:
+            # Locked or unwritable database: retrying row by row would not
+            # help. Caught broadly so the writer thread keeps running.
+            self._failed(len(batch), e)
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            row = self._pending.get()
+            batch = []
+            if row is _STOP:
+                stopping = True
+            else:
+                batch.append(row)
+            deadline = time.monotonic() + self.flush_interval
+            while batch and not stopping and len(batch) < self.batch_size:
+                try:
+                    row = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                else:
+                    batch.append(row)
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + stopping):
+                self._pending.task_done()
+
+    def flush(self):
+        """Wait until every queued screening is written; re-raise the last write error"""
+        self._pending.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def metrics(self):
+        """Writer counters: rows queued, written and lost, batches, and the last error"""
+        return {
+            'queued': self._pending.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'failed_rows': self.failed_rows,
+            'last_error': self.last_error,
+        }
+
+    def close(self):
+        if self._writer.is_alive():
+            self._pending.put(_STOP)
+            self._writer.join()
+        self.pool.close()
+
+    def history(self, user_id, test_type=None, since=None, until=None,
+                columns=("voice_stability", "breathing_rate")):
+        """One user's screenings, oldest first, as {column: array} plus recorded_at
+
+        since and until are Unix seconds. Unqueued writes are not flushed
+        first, so a screening recorded a moment ago may be missing.
+        """
+        unknown = set(columns) - set(INDICATOR_COLUMNS + ["test_type"])
+        if unknown:
+            raise ValueError(f"Unknown history columns: {sorted(unknown)}")
+        selected = ["recorded_at"] + list(columns)
+        query = f"SELECT {', '.join(selected)} FROM screenings WHERE user_id = ?"
+        params = [str(user_id)]
+        if since is not None:
+            query += " AND recorded_at >= ?"
+            params.append(float(since))
+        if until is not None:
+            query += " AND recorded_at < ?"
+            params.append(float(until))
+        if test_type is not None:
+            query += " AND test_type = ?"
+            params.append(test_type)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query + " ORDER BY recorded_at", params).fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(selected)
+        return {
+            name: np.array(column, dtype=object if name == "test_type" else np.float64)
+            for name, column in zip(selected, values)
+        }
+
+    def latest(self, user_id, limit=10, test_type=None):
+        """A user's most recent screenings, newest first, as dicts with decoded feature vectors"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM screenings WHERE user_id = ?"
+        params = [str(user_id)]
+        if test_type is not None:
+            query += " AND test_type = ?"
+            params.append(test_type)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query + " ORDER BY recorded_at DESC LIMIT ?",
+                                params + [int(limit)]).fetchall()
+        screenings = []
+        for row in rows:
+            screening = dict(zip(COLUMNS, row))
+            screening["voice_features"] = _vector(screening["voice_features"])
+            screening["parkinsons_features"] = _vector(screening["parkinsons_features"])
+            screenings.append(screening)
+        return screenings
+
+    def trends(self, user_id, test_type=None):
+        """{test_type: {metric: statistics}} for one user, from the trends table
+
+        Statistics are count, mean, std, ewma, min, max, last (the most
+        recent value), first_at and last_at. Like history, this does not
+        wait for queued writes.
+        """
+        query = f"SELECT test_type, metric, {', '.join(TREND_COLUMNS)} FROM trends WHERE user_id = ?"
+        params = [str(user_id)]
+        if test_type is not None:
+            query += " AND test_type = ?"
+            params.append(test_type)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        trends = {}
+        for test_type, metric, *state in rows:
+            trends.setdefault(test_type, {})[metric] = trend_summary(state)
+        return trends
+
+    def rebuild_trends(self, user_id=None):
+        """Recompute the trends rows of one user (or everyone) from the stored screenings"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM screenings"
+        params = []
+        if user_id is not None:
+            query += " WHERE user_id = ?"
+            params.append(str(user_id))
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if user_id is None:
+                    conn.execute("DELETE FROM trends")
+                else:
+                    conn.execute("DELETE FROM trends WHERE user_id = ?", params)
+                # Primary key order: one user at a time, oldest first
+                rows = conn.execute(query + " ORDER BY user_id, recorded_at, screening_id", params)
+                batch = []
+                for row in rows:
+                    if batch and row[0] != batch[-1][0]:
+                        update_trends(conn, batch)
+                        batch = []
+                    batch.append(row)
+                update_trends(conn, batch)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def count(self, user_id=None):
+        with self.pool.connection() as conn:
+            if user_id is None:
+                return conn.execute("SELECT COUNT(*) FROM screenings").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM screenings WHERE user_id = ?",
+                                (str(user_id),)).fetchone()[0]
@@ -0,0 +1,12 @@
+"""Make the app modules (repo root), the Parkinson's modules and the
+benchmarks' synthetic signals importable."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(ROOT, "models")
+BENCHMARKS_DIR = os.path.join(ROOT, "benchmarks")
+
+for path in (ROOT, MODELS_DIR, BENCHMARKS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
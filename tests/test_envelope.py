@@ -0,0 +1,32 @@
+"""Breathing rate recovered from the decimated envelope, batch and streaming."""
+import pytest
+
+import synthetic
+from audio_stream import StreamingAnalyzer
+from envelope import compute_envelope, breathing_rate_from_envelope
+
+SR = 22050
+TOLERANCE = 1.5
+
+
+@pytest.mark.parametrize("seconds", [10, 20, 40])
+@pytest.mark.parametrize("bpm", [12, 20])
+def test_breathing_rate_matches_synthetic_rate(bpm, seconds):
+    envelope = compute_envelope(synthetic.breathing(seconds, SR, bpm, seed=bpm), SR)
+    assert breathing_rate_from_envelope(envelope.values, envelope.rate) == pytest.approx(
+        bpm, abs=TOLERANCE)
+
+
+def test_sustained_vowel_has_no_breathing_rate():
+    envelope = compute_envelope(synthetic.sustained_vowel(10, SR, seed=3), SR)
+    assert breathing_rate_from_envelope(envelope.values, envelope.rate) == 0
+
+
+def test_streaming_rate_matches_batch():
+    y = synthetic.breathing(20, SR, 12, seed=1)
+    analyzer = StreamingAnalyzer(sr=SR)
+    for start in range(0, len(y), SR):
+        analyzer.feed(y[start:start + SR])
+    envelope = compute_envelope(y, SR)
+    assert analyzer.breathing_rate() == pytest.approx(
+        breathing_rate_from_envelope(envelope.values, envelope.rate), abs=0.1)
@@ -0,0 +1,41 @@
+"""FeatureCache eviction and warning pass-through."""
+import os
+import time
+import warnings
+
+import numpy as np
+
+import feature_cache
+import synthetic
+from feature_cache import FeatureCache, cached_extract_features, STALE_TMP_SECONDS
+
+
+def test_evict_removes_stale_temporary_files_only(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    stale, fresh = tmp_path / "ab" / "stale.tmp", tmp_path / "ab" / "fresh.tmp"
+    stale.parent.mkdir()
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    old = time.time() - STALE_TMP_SECONDS - 1
+    os.utime(stale, (old, old))
+    cache.evict()
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_other_warnings_are_passed_on(tmp_path, monkeypatch):
+    real_extract = feature_cache.extract_features_with_pitch
+
+    def noisy_extract(audio, pitch_backend):
+        warnings.warn("resampler fallback", RuntimeWarning)
+        return real_extract(audio, pitch_backend)
+
+    monkeypatch.setattr(feature_cache, "extract_features_with_pitch", noisy_extract)
+    path = synthetic.write_wav(str(tmp_path / "vowel.wav"),
+                               synthetic.sustained_vowel(1, 22050, seed=0), 22050)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        features = cached_extract_features(path, FeatureCache(str(tmp_path / "cache")), "praat")
+    assert len(features) == 22 and np.all(np.isfinite(features))
+    assert any(issubclass(w.category, RuntimeWarning) and "resampler fallback" in str(w.message)
+               for w in caught)
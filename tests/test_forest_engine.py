@@ -0,0 +1,75 @@
+"""FlatForest gives bit-identical probabilities to the sklearn model it was flattened from."""
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from forest_engine import FlatForest, BLOCK_SIZE
+from model_registry import load_model
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "models", "random_forest_model.pkl")
+
+
+@pytest.fixture(scope="module")
+def model():
+    with warnings.catch_warnings():
+        # The pickle predates the installed sklearn
+        warnings.simplefilter("ignore")
+        return load_model(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def forest(model):
+    return FlatForest.from_sklearn(model)
+
+
+def assert_same(model, forest, X):
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual, expected)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+def test_random_rows(model, forest):
+    rng = np.random.RandomState(0)
+    # Several blocks plus a partial one
+    X = rng.normal(size=(3 * BLOCK_SIZE + 17, 22)) * 2.0
+    X[rng.rand(*X.shape) < 0.1] = 0.0
+    assert_same(model, forest, X)
+
+
+def test_rows_on_the_thresholds(model, forest):
+    # Values equal to a split threshold take the left branch in both
+    rng = np.random.RandomState(1)
+    thresholds = forest.threshold[np.isfinite(forest.threshold)]
+    X = rng.choice(thresholds, size=(500, 22))
+    assert_same(model, forest, X)
+
+
+@pytest.mark.parametrize("value", [0.0, -1e30, 1e30, np.finfo(np.float32).max,
+                                   np.finfo(np.float32).tiny, -0.0])
+def test_constant_rows(model, forest, value):
+    assert_same(model, forest, np.full((1, 22), value))
+
+
+def test_missing_values_follow_sklearn(model, forest):
+    rng = np.random.RandomState(2)
+    X = rng.normal(size=(1000, 22)) * 2.0
+    X[rng.rand(*X.shape) < 0.2] = np.nan
+    X[0] = np.nan
+    assert_same(model, forest, X)
+
+
+def test_single_row_vector(model, forest):
+    row = np.random.RandomState(3).normal(size=22)
+    np.testing.assert_array_equal(forest.predict_proba(row), model.predict_proba(row[None, :]))
+
+
+def test_saved_and_memory_mapped_forest(model, forest, tmp_path):
+    forest.save(str(tmp_path))
+    loaded = FlatForest.load(str(tmp_path), mmap_mode="r")
+    X = np.random.RandomState(4).normal(size=(300, 22)) * 2.0
+    assert_same(model, loaded, X)
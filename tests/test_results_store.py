@@ -0,0 +1,23 @@
+"""Patient IDs are keyed, so the stored user_id cannot be recomputed without the secret."""
+import hashlib
+
+from results_store import patient_user_id, PATIENT_ID_KEY_ENV
+
+
+def test_no_history_without_key(monkeypatch):
+    monkeypatch.delenv(PATIENT_ID_KEY_ENV, raising=False)
+    assert patient_user_id("MRN-1234") is None
+
+
+def test_user_id_depends_on_the_key(monkeypatch):
+    monkeypatch.setenv(PATIENT_ID_KEY_ENV, "first secret")
+    first = patient_user_id(" mrn-1234 ")
+    assert first == patient_user_id("MRN-1234")
+    assert first != hashlib.sha256(b"MRN-1234").hexdigest()[:len(first)]
+    monkeypatch.setenv(PATIENT_ID_KEY_ENV, "second secret")
+    assert patient_user_id("MRN-1234") != first
+
+
+def test_no_history_without_patient_id(monkeypatch):
+    monkeypatch.setenv(PATIENT_ID_KEY_ENV, "secret")
+    assert patient_user_id("  ") is None
@@ -0,0 +1,60 @@
+import asyncio
+import io
+import json
+import wave
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from service import ScoringService, extract_wav_bytes
+
+def wav_bytes(samples, sr=22050):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+def post(body, headers=None):
+    """A Starlette request for POST /score with body as its only message"""
+    scope = {
+        "type": "http", "method": "POST", "path": "/score", "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    return Request(scope, receive)
+
+def test_silent_recording_is_rejected_with_422():
+    silent = wav_bytes(np.zeros(2 * 22050))
+    features, error, _, _, _ = extract_wav_bytes(silent)
+    assert features is None
+    assert "HNR" in error and "DFA" in error
+
+    service = ScoringService()
+    service.executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        response = asyncio.run(service.score(post(silent)))
+    finally:
+        service.executor.shutdown()
+    assert response.status_code == 422
+    assert "HNR" in json.loads(response.body)["error"]
+
+@pytest.mark.parametrize("length", ["abc", "12.5", ""])
+def test_malformed_content_length_is_400(length):
+    service = ScoringService()
+    with pytest.raises(HTTPException) as caught:
+        asyncio.run(service.score(post(b"RIFF", {"Content-Length": length})))
+    assert caught.value.status_code == 400
+
+def test_oversized_content_length_is_413():
+    service = ScoringService(max_upload_bytes=10)
+    with pytest.raises(HTTPException) as caught:
+        asyncio.run(service.score(post(b"RIFF", {"Content-Length": "11"})))
+    assert caught.value.status_code == 413